@@ -4,6 +4,7 @@ Main bot file with instilization and command setup
 """
 
 import sys
+import asyncio
 from datetime import datetime, timezone
 from pyrogram import Client, filters, idle
 from pyrogram.types import Message
@@ -14,14 +15,27 @@ from config.database import db
 
 # Import database operations
 from database.mongo import MongoOperations
+from database.activity_buffer import activity_buffer
+
+# Import broadcast jobs
+from broadcaster.engine import broadcast_rate_limiter
+from broadcaster.jobs import stop_broadcast_jobs
+from broadcaster.partitions import WORKER_ID
+from broadcaster.rate_share import RateShare
+from broadcaster.scheduler import broadcast_scheduler
 
 # Import handlers
 from handlers.start import start_command
 from handlers.broadcast import broadcast_command
 from handlers.stats import stats_command
+from handlers.unsend import unsend_command
+from handlers.jobs import jobs_command
 
 # Import utilities
 from utils.logger import Logger
+from utils.antiflood import flood_filter
+from utils.metrics import register_callback, start_metrics_server, track_command
+from utils.watchdog import LoopWatchdog
 
 
 class HighTierBots:
@@ -31,6 +45,10 @@ class HighTierBots:
     """Initialize the bot."""
     self.app = None
     self.logger = None
+    self.metrics_server = None
+    self.watchdog = None
+    self.rate_share = None
+    self.background_tasks = []
     self.start_time = datetime.now(timezone.utc)
     
     print("=" * 60)
@@ -61,24 +79,45 @@ class HighTierBots:
   def register_handlers(self):
     """Register command handlers."""
     try:
+      # Anti-flood guard, runs before every handler below (group 0)
+      @self.app.on_message(filters.private, group=-1)
+      async def handle_flood(client: Client, message: Message):
+        await flood_filter(client, message)
+      
       # Public commands
       @self.app.on_message(filters.command("start") & filters.private)
+      @track_command("start")
       async def handle_start(client: Client, message: Message):
         await start_command(client, message)
       
       # Owner-only commands
       @self.app.on_message(filters.command("broadcast") & filters.private)
+      @track_command("broadcast")
       async def handle_broadcast(client: Client, message: Message):
         await broadcast_command(client, message)
       
       @self.app.on_message(filters.command("stats") & filters.private)
+      @track_command("stats")
       async def handle_stats(client: Client, message: Message):
         await stats_command(client, message)
       
+      @self.app.on_message(filters.command("unsend") & filters.private)
+      @track_command("unsend")
+      async def handle_unsend(client: Client, message: Message):
+        await unsend_command(client, message)
+      
+      @self.app.on_message(filters.command("jobs") & filters.private)
+      @track_command("jobs")
+      async def handle_jobs(client: Client, message: Message):
+        await jobs_command(client, message)
+      
       print("✅ Command handlers registered successfully")
+      print("   • anti-flood guard (all private messages)")
       print("   • /start (public)")
       print("   • /broadcast (owner only)")
       print("   • /stats (owner only)")
+      print("   • /unsend (owner only)")
+      print("   • /jobs (owner only)")
       return True
         
     except Exception as e:
@@ -92,10 +131,36 @@ class HighTierBots:
        
       self.logger = Logger(self.app)
       self.app._logger = self.logger
+      self.logger.start()
+      register_callback("log_queue_depth", "Log group messages waiting to be sent.", lambda: self.logger.stats()["queued"])
+      register_callback(
+        "log_messages_dropped_total", "Log group messages dropped on a full queue.",
+        lambda: self.logger.dropped, kind="counter"
+      )
+      self.metrics_server = await start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT)
+      self.watchdog = LoopWatchdog(
+        threshold=Config.LOOP_LAG_THRESHOLD,
+        report_interval=Config.LOOP_STALL_REPORT_INTERVAL,
+        logger=self.logger
+      )
+      self.watchdog.start()
        
-      MongoOperations.init_bot_stats(self.start_time)
+      await db.initialize()
        
-      total_users = MongoOperations.get_total_users()
+      await MongoOperations.init_bot_stats(self.start_time)
+      
+      counters = await MongoOperations.reconcile_user_counters()
+      total_users = counters["total_users"]
+      
+      self.background_tasks.append(
+        asyncio.create_task(self.reconcile_counters_loop())
+      )
+      activity_buffer.start()
+      
+      # Share the token's broadcast rate with worker.py processes on it
+      self.rate_share = RateShare(broadcast_rate_limiter, Config.BOT_TOKEN, WORKER_ID)
+      self.rate_share.start()
+      await broadcast_scheduler.start(self.app)
       
       await self.logger.log_bot_started(total_users)
       
@@ -116,10 +181,29 @@ class HighTierBots:
     finally:
       await self.stop_bot()
   
+  async def reconcile_counters_loop(self):
+    """Periodically correct drift in the bot_stats user counters."""
+    while True:
+      await asyncio.sleep(Config.COUNTER_RECONCILE_INTERVAL)
+      await MongoOperations.reconcile_user_counters()
+  
   async def stop_bot(self):
     """Stop the bot."""
     try:
       print("\n🔄 Shutting down bot...")
+      for task in self.background_tasks:
+        task.cancel()
+      if self.watchdog:
+        self.watchdog.stop()
+      broadcast_scheduler.stop()
+      await stop_broadcast_jobs()
+      if self.rate_share:
+        await self.rate_share.stop()
+      await activity_buffer.stop()
+      if self.logger:
+        await self.logger.stop()
+      if self.metrics_server:
+        self.metrics_server.close()
       if self.app.is_connected:
         await self.app.stop()
       db.close()
@@ -0,0 +1 @@
+#(©)HighTierBots - Broadcaster Package
@@ -0,0 +1,58 @@
+"""
+#(©)HighTierBots - Per-recipient broadcast delivery log.
+Outcome rows are buffered in memory and written to broadcast_deliveries
+with unordered insert_many batches, off the send path.
+"""
+
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from database.batch_buffer import BatchBuffer
+from database.mongo import MongoOperations
+
+
+OUTCOME_SENT = "sent"
+OUTCOME_BLOCKED = "blocked"
+OUTCOME_FAILED = "failed"
+
+
+class DeliveryLog(BatchBuffer):
+    """Buffers delivery rows for one broadcast and inserts them in bulk."""
+    
+    items_name = "broadcast deliveries"
+    
+    def __init__(self, broadcast_id: ObjectId, batch_size: int = 500):
+        super().__init__(batch_size)
+        self.broadcast_id = broadcast_id
+    
+    def record(
+        self,
+        user_id: int,
+        outcome: str,
+        latency_ms: float,
+        error: Optional[str] = None,
+        message_ids: Optional[List[int]] = None
+    ):
+        """Buffer one delivery row; starts a background flush when full."""
+        self._add({
+            "broadcast_id": self.broadcast_id,
+            "user_id": user_id,
+            "outcome": outcome,
+            "error": error,
+            "latency_ms": round(latency_ms, 1),
+            "message_ids": message_ids or [],
+            "created_at": datetime.now(timezone.utc)
+        })
+    
+    async def _write(self, batch: List[dict]) -> int:
+        return await MongoOperations.insert_broadcast_deliveries(batch)
+    
+    def _unwritten(self, batch: List[dict], error: Exception) -> List[dict]:
+        """Only the rows an unordered insert_many reported as failed."""
+        if isinstance(error, BulkWriteError):
+            failed = sorted({item["index"] for item in error.details.get("writeErrors", [])})
+            return [batch[index] for index in failed]
+        return batch
@@ -0,0 +1,402 @@
+"""
+#(©)HighTierBots - Concurrent broadcast engine.
+A pool of sender tasks consumes a stream of user IDs, with every send
+gated by one shared adaptive rate limiter. Recipients hit by FloodWait
+are requeued with bounded retries, and a checkpoint cursor tracks the
+highest user ID below which every recipient has been handled.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait, UserIsBlocked, InputUserDeactivated
+from pyrogram.types import Message
+
+from broadcaster.delivery_log import (
+    DeliveryLog,
+    OUTCOME_BLOCKED,
+    OUTCOME_FAILED,
+    OUTCOME_SENT
+)
+from broadcaster.rate_limiter import AdaptiveRateLimiter
+from config.config import Config
+from database.blocked_buffer import BlockedUserBuffer
+from utils.metrics import BROADCAST_ERRORS, BROADCAST_MESSAGES, register_callback
+
+
+# Attempts at the final flush of blocked users and delivery rows
+FINAL_FLUSH_ATTEMPTS = 3
+
+
+class BroadcastPayload:
+    """
+    What to send: plain text, or a server-side copy of an existing message.
+    
+    Copies use copy_message (copy_media_group for albums), so any message
+    type keeps its media, entities and markup without being re-uploaded.
+    """
+    
+    def __init__(
+        self,
+        text: str,
+        from_chat_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        album: bool = False,
+        caption: Optional[str] = None
+    ):
+        """
+        Args:
+            text: Message text (or a description of the copied message)
+            from_chat_id: Chat holding the message to copy
+            message_id: Message to copy
+            album: Copy the whole media group of message_id
+            caption: Caption replacing the copied message's caption
+        """
+        self.text = text
+        self.from_chat_id = from_chat_id
+        self.message_id = message_id
+        self.album = album
+        self.caption = caption
+    
+    @property
+    def is_copy(self) -> bool:
+        """Whether the payload is copied from an existing message."""
+        return self.message_id is not None
+    
+    def to_dict(self) -> dict:
+        """Serialize the payload for the broadcast job record."""
+        return {
+            "text": self.text,
+            "from_chat_id": self.from_chat_id,
+            "message_id": self.message_id,
+            "album": self.album,
+            "caption": self.caption
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "BroadcastPayload":
+        """Rebuild a payload stored with to_dict."""
+        return cls(
+            data.get("text", ""),
+            data.get("from_chat_id"),
+            data.get("message_id"),
+            data.get("album", False),
+            data.get("caption")
+        )
+    
+    @classmethod
+    def from_message(cls, text: str, replied_msg: Optional[Message], caption: Optional[str] = None) -> "BroadcastPayload":
+        """
+        Build a payload from the broadcast text and optional replied message.
+        
+        Args:
+            text: Broadcast text, used as is when there is no replied message
+            replied_msg: Message to copy to every recipient
+            caption: Caption override for the copied message
+        """
+        if replied_msg:
+            return cls(
+                text,
+                from_chat_id=replied_msg.chat.id,
+                message_id=replied_msg.id,
+                album=bool(replied_msg.media_group_id),
+                caption=caption
+            )
+        return cls(text)
+    
+    async def send(self, client: Client, chat_id: int):
+        """Send the payload to one chat and return the sent message(s)."""
+        if not self.is_copy:
+            return await client.send_message(chat_id, self.text)
+        if self.album:
+            if self.caption is not None:
+                # A single caption goes on the first item, as Telegram shows it
+                return await client.copy_media_group(
+                    chat_id, self.from_chat_id, self.message_id, captions=self.caption
+                )
+            return await client.copy_media_group(chat_id, self.from_chat_id, self.message_id)
+        if self.caption is not None:
+            return await client.copy_message(
+                chat_id, self.from_chat_id, self.message_id, caption=self.caption
+            )
+        return await client.copy_message(chat_id, self.from_chat_id, self.message_id)
+
+
+class BroadcastStats:
+    """Running counters for one broadcast."""
+    
+    def __init__(
+        self,
+        successful: int = 0,
+        failed: int = 0,
+        blocked: int = 0,
+        flood_waits: int = 0,
+        flood_wait_seconds: float = 0.0
+    ):
+        """Counters may be seeded from a checkpoint when a job resumes."""
+        self.successful = successful
+        self.failed = failed
+        self.blocked = blocked
+        # FloodWaits hit by this broadcast (the rate limiter's are process-wide)
+        self.flood_waits = flood_waits
+        self.flood_wait_seconds = flood_wait_seconds
+        self.retried = 0
+        self._resumed_from = successful + failed
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+    
+    @property
+    def processed(self) -> int:
+        """Recipients handled so far."""
+        return self.successful + self.failed
+    
+    @property
+    def duration(self) -> float:
+        """Seconds since the broadcast started (or its total duration)."""
+        return (self.finished_at or time.monotonic()) - self.started_at
+    
+    @property
+    def throughput(self) -> float:
+        """Achieved messages per second in this run."""
+        sent = self.processed - self._resumed_from
+        return sent / self.duration if self.duration > 0 else 0.0
+
+
+class BroadcastEngine:
+    """Sends a payload to a stream of users with bounded concurrency."""
+    
+    def __init__(
+        self,
+        client: Client,
+        payload: BroadcastPayload,
+        rate_limiter: AdaptiveRateLimiter,
+        concurrency: int,
+        max_retries: int = 3,
+        stats: Optional[BroadcastStats] = None,
+        last_user_id: Optional[int] = None,
+        checkpoint: Optional[Callable[["BroadcastEngine"], Awaitable]] = None,
+        checkpoint_interval: float = 5.0,
+        delivery_log: Optional[DeliveryLog] = None
+    ):
+        """
+        Args:
+            stats: Counters to continue from when resuming
+            last_user_id: Cursor to continue from when resuming
+            checkpoint: Coroutine called with the engine every
+                `checkpoint_interval` seconds while running
+            delivery_log: Per-recipient outcome log, flushed before
+                every checkpoint and at the end; a checkpoint is skipped
+                while a flush fails
+        """
+        self.client = client
+        self.payload = payload
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.stats = stats or BroadcastStats()
+        self.last_user_id = last_user_id
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.delivery_log = delivery_log
+        self.blocked_users = BlockedUserBuffer()
+        self._retries: asyncio.Queue = asyncio.Queue()
+        self._dispatched: deque = deque()
+        self._handled: set = set()
+    
+    @property
+    def unflushed(self) -> bool:
+        """Whether blocked users or delivery rows are still waiting to be written."""
+        return bool(self.blocked_users.pending or (self.delivery_log and self.delivery_log.pending))
+    
+    async def _flush_side_writes(self):
+        """Write blocked users and delivery rows; raises if either fails."""
+        await self.blocked_users.flush()
+        if self.delivery_log:
+            await self.delivery_log.flush()
+    
+    async def _final_flush(self):
+        """Flush side writes at the end, retrying; raises if they still fail."""
+        for attempt in range(1, FINAL_FLUSH_ATTEMPTS + 1):
+            try:
+                await self._flush_side_writes()
+                return
+            except Exception:
+                if attempt == FINAL_FLUSH_ATTEMPTS:
+                    raise
+                await asyncio.sleep(attempt)
+    
+    def _mark_handled(self, user_id: int):
+        """Record a final outcome and advance the checkpoint cursor."""
+        self._handled.add(user_id)
+        while self._dispatched and self._dispatched[0] in self._handled:
+            self.last_user_id = self._dispatched.popleft()
+            self._handled.discard(self.last_user_id)
+    
+    def _log(self, user_id: int, outcome: str, started: float, error: Optional[Exception] = None, sent=None):
+        """Add a row to the delivery log, if there is one."""
+        if self.delivery_log is None:
+            return
+        if isinstance(sent, list):
+            message_ids = [message.id for message in sent]
+        else:
+            message_ids = [sent.id] if sent is not None else []
+        self.delivery_log.record(
+            user_id,
+            outcome,
+            latency_ms=(time.monotonic() - started) * 1000,
+            error=type(error).__name__ if error else None,
+            message_ids=message_ids
+        )
+    
+    async def _deliver(self, user_id: int, attempt: int):
+        """Send to one user and record the outcome."""
+        handled = True
+        started = time.monotonic()
+        try:
+            await self.rate_limiter.acquire()
+            started = time.monotonic()
+            sent = await self.payload.send(self.client, user_id)
+            self.rate_limiter.on_success()
+            self.stats.successful += 1
+            BROADCAST_MESSAGES.inc(OUTCOME_SENT)
+            self._log(user_id, OUTCOME_SENT, started, sent=sent)
+        
+        except FloodWait as e:
+            self.rate_limiter.on_flood_wait(e.value)
+            self.stats.flood_waits += 1
+            self.stats.flood_wait_seconds += e.value
+            BROADCAST_ERRORS.inc("FloodWait")
+            if attempt < self.max_retries:
+                handled = False
+                self.stats.retried += 1
+                BROADCAST_MESSAGES.inc("retried")
+                self._retries.put_nowait((user_id, attempt + 1))
+            else:
+                self.stats.failed += 1
+                BROADCAST_MESSAGES.inc(OUTCOME_FAILED)
+                self._log(user_id, OUTCOME_FAILED, started, error=e)
+                print(f"Giving up on {user_id} after {attempt + 1} FloodWaits")
+        
+        except (UserIsBlocked, InputUserDeactivated) as e:
+            self.stats.failed += 1
+            self.stats.blocked += 1
+            BROADCAST_MESSAGES.inc(OUTCOME_BLOCKED)
+            BROADCAST_ERRORS.inc(type(e).__name__)
+            self._log(user_id, OUTCOME_BLOCKED, started, error=e)
+            self.blocked_users.add(user_id)
+        
+        except Exception as e:
+            self.stats.failed += 1
+            BROADCAST_MESSAGES.inc(OUTCOME_FAILED)
+            BROADCAST_ERRORS.inc(type(e).__name__)
+            self._log(user_id, OUTCOME_FAILED, started, error=e)
+            print(f"Error broadcasting to {user_id}: {e}")
+        
+        finally:
+            if handled:
+                self._mark_handled(user_id)
+    
+    async def _sender(self, queue: asyncio.Queue):
+        """
+        Worker: deliver queued user IDs until a None sentinel arrives.
+        
+        Requeued retries are always taken first; after the sentinel the
+        worker keeps draining retries before it exits.
+        """
+        done = False
+        while True:
+            if not self._retries.empty():
+                await self._deliver(*self._retries.get_nowait())
+                continue
+            if done:
+                return
+            user_id = await queue.get()
+            if user_id is None:
+                done = True
+                continue
+            await self._deliver(user_id, 0)
+    
+    async def _run_senders(self, feed) -> None:
+        """Run the sender pool over a queue filled by the `feed` coroutine."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        senders = [
+            asyncio.create_task(self._sender(queue))
+            for _ in range(self.concurrency)
+        ]
+        try:
+            await feed(queue)
+            for _ in senders:
+                await queue.put(None)
+            await asyncio.gather(*senders)
+        finally:
+            for sender in senders:
+                sender.cancel()
+    
+    async def run(self, user_id_batches: AsyncIterator[List[int]]) -> BroadcastStats:
+        """
+        Broadcast to every user ID yielded by the stream.
+        
+        Args:
+            user_id_batches: Async iterator of user ID batches
+            
+        Returns:
+            Final BroadcastStats
+        """
+        async def feed_stream(queue: asyncio.Queue):
+            async for batch in user_id_batches:
+                for user_id in batch:
+                    self._dispatched.append(user_id)
+                    await queue.put(user_id)
+        
+        async def feed_nothing(queue: asyncio.Queue):
+            return
+        
+        checkpointer = None
+        if self.checkpoint:
+            checkpointer = asyncio.create_task(self._checkpoint_loop())
+        try:
+            await self._run_senders(feed_stream)
+            # Retries requeued by senders that were still in flight at the end
+            while not self._retries.empty():
+                await self._run_senders(feed_nothing)
+        finally:
+            if checkpointer:
+                checkpointer.cancel()
+            self.stats.finished_at = time.monotonic()
+            await self._final_flush()
+        return self.stats
+    
+    async def _checkpoint_loop(self):
+        """Call the checkpoint callback every checkpoint_interval seconds."""
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            try:
+                # Side writes first, so they always cover the saved cursor;
+                # if they fail the checkpoint is skipped
+                await self._flush_side_writes()
+                await self.checkpoint(self)
+            except Exception as e:
+                print(f"Error checkpointing broadcast: {e}")
+
+
+broadcast_rate_limiter = AdaptiveRateLimiter(
+    max_rate=Config.BROADCAST_RATE,
+    capacity=Config.BROADCAST_BURST,
+    min_rate=Config.BROADCAST_MIN_RATE
+)
+
+register_callback(
+    "broadcast_rate_limit", "Current adaptive broadcast rate in messages/s.",
+    lambda: broadcast_rate_limiter.rate
+)
+register_callback(
+    "flood_waits_total", "FloodWait errors seen by the broadcast rate limiter.",
+    lambda: broadcast_rate_limiter.flood_waits, kind="counter"
+)
+register_callback(
+    "flood_wait_seconds_total", "Seconds of FloodWait imposed on broadcasts.",
+    lambda: broadcast_rate_limiter.flood_wait_seconds, kind="counter"
+)
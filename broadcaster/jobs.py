@@ -0,0 +1,418 @@
+"""
+#(©)HighTierBots - Durable broadcast jobs.
+Each broadcast is a record in the broadcasts collection holding its
+status, payload, counters and a checkpoint cursor (last_user_id). New
+jobs are "queued" and started by the scheduler (broadcaster/scheduler.py);
+jobs left "running" by a previous process are requeued on startup and
+resume from their cursor.
+Partitioned jobs track their cursors per partition instead (see
+broadcaster/partitions.py). Unsend jobs use the same machinery to delete
+a previous broadcast's messages.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from bson import ObjectId
+from pyrogram import Client
+
+from broadcaster.delivery_log import DeliveryLog
+from broadcaster.engine import (
+    BroadcastEngine,
+    BroadcastPayload,
+    BroadcastStats,
+    broadcast_rate_limiter
+)
+from broadcaster.partitions import PartitionWorker, create_partitions
+from broadcaster.progress import ProgressReporter
+from broadcaster.unsend import UnsendPayload
+from config.config import Config
+from database.models import Broadcast
+from database.mongo import MongoOperations
+from utils.metrics import register_callback
+
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_PAUSED = "paused"
+STATUS_COMPLETED = "completed"
+STATUS_CANCELLED = "cancelled"
+STATUS_FAILED = "failed"
+
+KIND_BROADCAST = "broadcast"
+KIND_UNSEND = "unsend"
+
+# Jobs running in this process, by broadcast _id
+running_jobs: Dict[ObjectId, asyncio.Task] = {}
+
+register_callback("broadcast_active_jobs", "Broadcast jobs running in this process.", lambda: len(running_jobs))
+
+
+class BroadcastJob:
+    """A broadcast job backed by its record in the broadcasts collection."""
+    
+    def __init__(self, client: Client, record: dict):
+        self.client = client
+        self.record = record
+        self.id: ObjectId = record["_id"]
+        self.kind = record.get("kind") or KIND_BROADCAST
+        if self.kind == KIND_UNSEND:
+            self.payload = UnsendPayload(record["target_broadcast_id"])
+        else:
+            self.payload = BroadcastPayload.from_dict(record.get("payload") or {})
+        self.progress: Optional[ProgressReporter] = None
+        if record.get("progress_chat_id") and record.get("progress_message_id"):
+            title = "🗑 **Unsending...**" if self.kind == KIND_UNSEND else "📢 **Broadcasting...**"
+            self.progress = ProgressReporter(
+                client,
+                record["progress_chat_id"],
+                record["progress_message_id"],
+                title,
+                total=record.get("total_recipients", 0),
+                interval=Config.BROADCAST_PROGRESS_INTERVAL
+            )
+    
+    @classmethod
+    async def create(
+        cls,
+        client: Client,
+        payload: Optional[BroadcastPayload],
+        sent_by: int,
+        total_recipients: int,
+        progress_chat_id: Optional[int] = None,
+        progress_message_id: Optional[int] = None,
+        partitions: int = 0,
+        kind: str = KIND_BROADCAST,
+        target_broadcast_id: Optional[ObjectId] = None,
+        priority: int = 0,
+        scheduled_at: Optional[datetime] = None,
+        audience: Optional[dict] = None
+    ) -> Optional["BroadcastJob"]:
+        """
+        Persist a new queued job record and return the job, or None on failure.
+        
+        The scheduler starts it at `scheduled_at` (default: now), higher
+        `priority` first. `audience` restricts the recipients (see
+        MongoOperations.iter_user_ids).
+        
+        For an unsend job pass kind=KIND_UNSEND and the broadcast to retract
+        as target_broadcast_id and no payload.
+        """
+        if kind == KIND_UNSEND:
+            payload = UnsendPayload(target_broadcast_id)
+        record = Broadcast(
+            message=payload.text,
+            sent_by=sent_by,
+            total_recipients=total_recipients,
+            successful=0,
+            failed=0,
+            status=STATUS_QUEUED,
+            payload=payload.to_dict() if kind == KIND_BROADCAST else None,
+            progress_chat_id=progress_chat_id,
+            progress_message_id=progress_message_id,
+            partitions=partitions,
+            kind=kind,
+            target_broadcast_id=target_broadcast_id,
+            priority=priority,
+            scheduled_at=scheduled_at,
+            audience=audience
+        ).to_dict()
+        broadcast_id = await MongoOperations.create_broadcast(record)
+        if broadcast_id is None:
+            return None
+        record["_id"] = broadcast_id
+        return cls(client, record)
+    
+    def _counters(self, engine: BroadcastEngine) -> dict:
+        """Checkpoint fields for the job record."""
+        return {
+            "last_user_id": engine.last_user_id,
+            "successful": engine.stats.successful,
+            "failed": engine.stats.failed,
+            "blocked": engine.stats.blocked,
+            "flood_waits": engine.stats.flood_waits,
+            "flood_wait_seconds": engine.stats.flood_wait_seconds
+        }
+    
+    async def _checkpoint(self, engine: BroadcastEngine):
+        """Persist the cursor and counters, then refresh the progress message."""
+        await MongoOperations.update_broadcast(self.id, self._counters(engine))
+        if self.progress:
+            self.progress.update(engine.stats)
+    
+    async def run(self) -> Optional[BroadcastStats]:
+        """
+        Run (or resume) the job until every recipient has been handled.
+        
+        On cancellation the latest cursor is saved. The record keeps its
+        status: still "running" on shutdown (requeued on the next start),
+        or whatever /jobs pause/cancel set before cancelling the task.
+        
+        Any other error marks the job failed (see _fail) and returns None.
+        """
+        try:
+            if self.kind == KIND_BROADCAST and self.record.get("partitions", 0) > 1:
+                return await self._run_partitioned()
+            return await self._run_single()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._fail(e)
+            return None
+    
+    async def _run_single(self) -> BroadcastStats:
+        """Send the whole job from this process."""
+        engine = BroadcastEngine(
+            self.client,
+            self.payload,
+            rate_limiter=broadcast_rate_limiter,
+            concurrency=Config.BROADCAST_JOB_CONCURRENCY,
+            max_retries=Config.BROADCAST_MAX_RETRIES,
+            stats=BroadcastStats(
+                successful=self.record.get("successful", 0),
+                failed=self.record.get("failed", 0),
+                blocked=self.record.get("blocked", 0),
+                flood_waits=self.record.get("flood_waits", 0),
+                flood_wait_seconds=self.record.get("flood_wait_seconds", 0.0)
+            ),
+            last_user_id=self.record.get("last_user_id"),
+            checkpoint=self._checkpoint,
+            checkpoint_interval=Config.BROADCAST_CHECKPOINT_INTERVAL,
+            delivery_log=DeliveryLog(self.id) if self.kind == KIND_BROADCAST else None
+        )
+        if self.kind == KIND_UNSEND:
+            audience = self.payload.targets(after_user_id=engine.last_user_id)
+        else:
+            audience = MongoOperations.iter_user_ids(
+                exclude_blocked=True,
+                after_user_id=engine.last_user_id,
+                audience=self.record.get("audience")
+            )
+        
+        try:
+            stats = await engine.run(audience)
+        except (asyncio.CancelledError, Exception):
+            # Save the cursor on shutdown, pause/cancel and errors alike,
+            # unless it would skip delivery rows that were never written
+            if not engine.unflushed:
+                await MongoOperations.update_broadcast(self.id, self._counters(engine))
+            if self.progress:
+                await self.progress.close()
+            raise
+        
+        await MongoOperations.update_broadcast(self.id, {
+            **self._counters(engine),
+            "status": STATUS_COMPLETED,
+            "total_recipients": stats.processed
+        })
+        await self._report(stats)
+        return stats
+    
+    async def _run_partitioned(self) -> BroadcastStats:
+        """
+        Split the job into partitions and help send them.
+        
+        Other workers may hold some partitions; this process keeps
+        claiming (including expired leases) until every partition is done.
+        """
+        stats = BroadcastStats()
+        await create_partitions(
+            self.id, self.record["partitions"], self.record.get("audience"), self.payload.is_copy
+        )
+        # Partitions held by a pause become claimable again
+        await MongoOperations.release_broadcast_partitions(self.id)
+        worker = PartitionWorker(self.client)
+        
+        progress_task = asyncio.create_task(self._partition_progress_loop(stats))
+        
+        try:
+            while await MongoOperations.count_broadcast_partitions(self.id, open_only=True):
+                await worker.work_on(self.id)
+                await asyncio.sleep(Config.BROADCAST_CHECKPOINT_INTERVAL)
+        finally:
+            progress_task.cancel()
+        
+        record = await MongoOperations.get_broadcast(self.id) or {}
+        stats.successful = record.get("successful", 0)
+        stats.failed = record.get("failed", 0)
+        stats.blocked = record.get("blocked", 0)
+        totals = await MongoOperations.sum_broadcast_partitions(self.id)
+        stats.flood_waits = totals["flood_waits"]
+        stats.flood_wait_seconds = totals["flood_wait_seconds"]
+        stats.finished_at = time.monotonic()
+        
+        await MongoOperations.update_broadcast(self.id, {
+            "status": STATUS_COMPLETED,
+            "total_recipients": stats.processed,
+            "flood_waits": stats.flood_waits,
+            "flood_wait_seconds": stats.flood_wait_seconds
+        })
+        await self._report(stats)
+        return stats
+    
+    async def _fail(self, error: Exception):
+        """
+        Mark the job failed and tell the owner and the log group.
+        
+        The checkpoint is kept and the partitions are held, so
+        /jobs resume retries the job from where it stopped.
+        """
+        print(f"❌ Broadcast job {self.id} failed: {error}")
+        await MongoOperations.set_broadcast_status(self.id, STATUS_FAILED, [STATUS_RUNNING])
+        await MongoOperations.hold_broadcast_partitions(self.id)
+        if self.progress:
+            await self.progress.close()
+        
+        if self.record.get("progress_chat_id") and self.record.get("progress_message_id"):
+            try:
+                await self.client.edit_message_text(
+                    self.record["progress_chat_id"],
+                    self.record["progress_message_id"],
+                    "❌ **Broadcast Failed**\n\n"
+                    f"Error: `{error}`\n\n"
+                    f"Progress is saved. Use `/jobs resume {self.id}` to retry from the checkpoint."
+                )
+            except Exception as e:
+                print(f"Error updating broadcast progress message: {e}")
+        
+        if hasattr(self.client, '_logger'):
+            await self.client._logger.log_error(
+                f"Broadcast job {self.id} failed: {error}", "broadcaster.jobs"
+            )
+    
+    async def _partition_progress_loop(self, stats: BroadcastStats):
+        """Refresh the progress message from the partitions' checkpoints."""
+        if not self.progress:
+            return
+        while True:
+            await asyncio.sleep(Config.BROADCAST_PROGRESS_INTERVAL)
+            totals = await MongoOperations.sum_broadcast_partitions(self.id)
+            stats.successful = totals["successful"]
+            stats.failed = totals["failed"]
+            stats.blocked = totals["blocked"]
+            self.progress.update(stats)
+    
+    async def _report(self, stats: BroadcastStats):
+        """Edit the progress message with results and log to the log group."""
+        if self.progress:
+            await self.progress.close()
+        successful = stats.successful
+        failed = stats.failed
+        blocked = stats.blocked
+        duration = stats.duration
+        throughput = stats.throughput
+        total_users = stats.processed
+        
+        success_rate = (successful/total_users*100) if total_users > 0 else 0
+        avg_time_per_user = (duration / total_users) if total_users > 0 else 0
+        
+        title = "🗑 **Unsend Complete!**" if self.kind == KIND_UNSEND else "📢 **Broadcast Complete!**"
+        results_message = (
+            f"{title}\n\n"
+            "📊 **Results:**\n"
+            f"✅ Successful: **{successful}**\n"
+            f"❌ Failed: **{failed}** (🚫 Blocked: {blocked})\n"
+            f"📈 Total Recipients: **{total_users}**\n"
+            f"📊 Success Rate: **{success_rate:.1f}%**\n\n"
+            "⏱️ **Timing:**\n"
+            f"⏳ Total Duration: **{duration:.2f}s**\n"
+            f"⚡ Avg per User: **{avg_time_per_user*1000:.1f}ms**\n"
+            f"🚀 Throughput: **{throughput:.1f} msg/s**\n"
+            f"🚦 Rate Limiter: {broadcast_rate_limiter.state()} "
+            f"({stats.flood_waits} FloodWaits, {stats.retried} retries)"
+        )
+        
+        if self.record.get("progress_chat_id") and self.record.get("progress_message_id"):
+            try:
+                await self.client.edit_message_text(
+                    self.record["progress_chat_id"],
+                    self.record["progress_message_id"],
+                    results_message
+                )
+            except Exception as e:
+                print(f"Error updating broadcast progress message: {e}")
+        
+        # Log to log group
+        if hasattr(self.client, '_logger'):
+            try:
+                # Create detailed log message with stats
+                log_stats = (
+                    f"📊 **Broadcast Statistics:**\n"
+                    f"✅ Sent: {successful}\n"
+                    f"❌ Failed: {failed}\n"
+                    f"🚫 Blocked: {blocked}\n"
+                    f"📈 Total: {total_users}\n"
+                    f"📊 Rate: {success_rate:.1f}%\n\n"
+                    f"⏱️ **Performance:**\n"
+                    f"⏳ Duration: {duration:.2f}s\n"
+                    f"⚡ Speed: {avg_time_per_user*1000:.1f}ms/user\n"
+                    f"🚀 Throughput: {throughput:.1f} msg/s\n"
+                    f"🚦 FloodWaits: {stats.flood_waits} "
+                    f"({stats.flood_wait_seconds:.0f}s), "
+                    f"rate {broadcast_rate_limiter.state()}"
+                )
+                
+                await self.client._logger.log_broadcast(
+                    sent_by=Config.OWNER_USERNAME,
+                    message=self.payload.text,
+                    successful=successful,
+                    failed=failed,
+                    total=total_users,
+                    stats=log_stats
+                )
+            except Exception as e:
+                print(f"Error logging broadcast: {e}")
+
+
+def start_job(job: BroadcastJob) -> asyncio.Task:
+    """Run a job in a tracked background task."""
+    task = asyncio.create_task(job.run())
+    running_jobs[job.id] = task
+    task.add_done_callback(lambda _: running_jobs.pop(job.id, None))
+    return task
+
+
+async def pause_job(broadcast_id: ObjectId) -> bool:
+    """
+    Pause a queued or running job; a running one stops at its checkpoint.
+    
+    Partitions are put on hold, so worker.py processes stop at their next
+    heartbeat and cannot claim the rest.
+    """
+    paused = await MongoOperations.set_broadcast_status(
+        broadcast_id, STATUS_PAUSED, [STATUS_QUEUED, STATUS_RUNNING]
+    )
+    if paused:
+        await MongoOperations.hold_broadcast_partitions(broadcast_id)
+        if broadcast_id in running_jobs:
+            running_jobs[broadcast_id].cancel()
+    return paused
+
+
+async def resume_job(broadcast_id: ObjectId) -> bool:
+    """Put a paused or failed job back in the queue; it continues from its cursor."""
+    return await MongoOperations.set_broadcast_status(
+        broadcast_id, STATUS_QUEUED, [STATUS_PAUSED, STATUS_FAILED]
+    )
+
+
+async def cancel_job(broadcast_id: ObjectId) -> bool:
+    """Cancel a queued, running, paused or failed job for good."""
+    cancelled = await MongoOperations.set_broadcast_status(
+        broadcast_id, STATUS_CANCELLED, [STATUS_QUEUED, STATUS_RUNNING, STATUS_PAUSED, STATUS_FAILED]
+    )
+    if cancelled:
+        await MongoOperations.hold_broadcast_partitions(broadcast_id)
+        if broadcast_id in running_jobs:
+            running_jobs[broadcast_id].cancel()
+    return cancelled
+
+
+async def stop_broadcast_jobs():
+    """Cancel running jobs and wait for their final checkpoints."""
+    tasks = list(running_jobs.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,203 @@
+"""
+#(©)HighTierBots - Partitioned broadcasts.
+A broadcast can be split into user_id range partitions stored in the
+broadcast_partitions collection. Any process running a worker (the bot
+itself or worker.py, possibly on other hosts or bot tokens) leases a
+partition, sends to its range and renews the lease with heartbeats that
+also checkpoint its cursor. A dead worker's lease expires and the
+partition is picked up again from its last checkpoint.
+"""
+
+import asyncio
+import os
+import socket
+from typing import Optional
+
+from bson import ObjectId
+from pyrogram import Client
+
+from broadcaster.delivery_log import DeliveryLog
+from broadcaster.engine import (
+    BroadcastEngine,
+    BroadcastPayload,
+    BroadcastStats,
+    broadcast_rate_limiter
+)
+from config.config import Config
+from database.mongo import MongoOperations
+
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def create_partitions(
+    broadcast_id: ObjectId,
+    count: int,
+    audience: Optional[dict] = None,
+    is_copy: bool = False
+) -> int:
+    """
+    Split the audience into `count` user_id ranges for a broadcast.
+    
+    Each partition carries the broadcast's audience filters, so workers
+    stream the same filtered audience within their range, and whether the
+    payload is copied from the owner's chat with the main bot.
+    
+    Does nothing if the broadcast already has partitions, so it is safe
+    to call again when a job resumes.
+    
+    Returns:
+        Number of partitions the broadcast has
+    """
+    existing = await MongoOperations.count_broadcast_partitions(broadcast_id)
+    if existing:
+        return existing
+    
+    boundaries = await MongoOperations.sample_user_id_boundaries(count, audience)
+    lowers = [None] + boundaries
+    uppers = boundaries + [None]
+    partitions = [
+        {
+            "broadcast_id": broadcast_id,
+            "index": index,
+            "after_user_id": lower,
+            "until_user_id": upper,
+            "audience": audience,
+            "is_copy": is_copy,
+            "status": "pending",
+            "last_user_id": lower,
+            "successful": 0,
+            "failed": 0,
+            "blocked": 0
+        }
+        for index, (lower, upper) in enumerate(zip(lowers, uppers))
+    ]
+    if not await MongoOperations.create_broadcast_partitions(partitions):
+        return await MongoOperations.count_broadcast_partitions(broadcast_id)
+    return len(partitions)
+
+
+class PartitionWorker:
+    """Claims partitions and sends to their user_id ranges."""
+    
+    def __init__(self, client: Client, owner: str = WORKER_ID, text_only: bool = False):
+        """
+        Args:
+            client: Client used to send
+            owner: Worker identifier stored in leases
+            text_only: Only claim partitions of text payloads (set when the
+                client is another bot, which cannot copy from the owner's chat)
+        """
+        self.client = client
+        self.owner = owner
+        self.text_only = text_only
+        self.lease_seconds = Config.BROADCAST_LEASE_SECONDS
+    
+    async def run_partition(self, partition: dict, payload: BroadcastPayload) -> Optional[BroadcastStats]:
+        """
+        Send to one leased partition.
+        
+        Returns:
+            Final stats, or None if the lease was lost to another worker
+        """
+        lease_lost = False
+        
+        def counters(engine: BroadcastEngine) -> dict:
+            return {
+                "last_user_id": engine.last_user_id,
+                "successful": engine.stats.successful,
+                "failed": engine.stats.failed,
+                "blocked": engine.stats.blocked,
+                "flood_waits": engine.stats.flood_waits,
+                "flood_wait_seconds": engine.stats.flood_wait_seconds
+            }
+        
+        async def heartbeat(engine: BroadcastEngine):
+            nonlocal lease_lost
+            renewed = await MongoOperations.heartbeat_broadcast_partition(
+                partition["_id"], self.owner, self.lease_seconds, counters(engine)
+            )
+            if not renewed:
+                lease_lost = True
+                send_task.cancel()
+        
+        engine = BroadcastEngine(
+            self.client,
+            payload,
+            rate_limiter=broadcast_rate_limiter,
+            concurrency=Config.BROADCAST_JOB_CONCURRENCY,
+            max_retries=Config.BROADCAST_MAX_RETRIES,
+            stats=BroadcastStats(
+                successful=partition.get("successful", 0),
+                failed=partition.get("failed", 0),
+                blocked=partition.get("blocked", 0),
+                flood_waits=partition.get("flood_waits", 0),
+                flood_wait_seconds=partition.get("flood_wait_seconds", 0.0)
+            ),
+            last_user_id=partition.get("last_user_id"),
+            checkpoint=heartbeat,
+            checkpoint_interval=Config.BROADCAST_CHECKPOINT_INTERVAL,
+            delivery_log=DeliveryLog(partition["broadcast_id"])
+        )
+        audience = MongoOperations.iter_user_ids(
+            exclude_blocked=True,
+            after_user_id=engine.last_user_id,
+            until_user_id=partition.get("until_user_id"),
+            audience=partition.get("audience")
+        )
+        send_task = asyncio.create_task(engine.run(audience))
+        
+        try:
+            stats = await send_task
+        except asyncio.CancelledError:
+            if not lease_lost:
+                # Shutdown: save progress and release the lease immediately
+                # (a paused or cancelled job's partitions are already held)
+                await MongoOperations.heartbeat_broadcast_partition(
+                    partition["_id"], self.owner, 0, {} if engine.unflushed else counters(engine)
+                )
+                send_task.cancel()
+                raise
+            print(f"⚠️ Lost lease on partition {partition['index']} of {partition['broadcast_id']}")
+            return None
+        
+        if not await MongoOperations.complete_broadcast_partition(
+            partition["_id"], self.owner, counters(engine)
+        ):
+            return None
+        return stats
+    
+    async def work_on(self, broadcast_id: Optional[ObjectId] = None) -> int:
+        """
+        Claim and run partitions until none are claimable.
+        
+        Args:
+            broadcast_id: Restrict to one broadcast (any running one if None)
+            
+        Returns:
+            Number of partitions completed
+        """
+        completed = 0
+        payloads = {}
+        while True:
+            partition = await MongoOperations.claim_broadcast_partition(
+                self.owner, self.lease_seconds, broadcast_id, self.text_only
+            )
+            if partition is None:
+                return completed
+            
+            parent_id = partition["broadcast_id"]
+            if parent_id not in payloads:
+                record = await MongoOperations.get_broadcast(parent_id) or {}
+                payloads[parent_id] = BroadcastPayload.from_dict(record.get("payload") or {})
+            
+            print(f"📦 {self.owner} sending partition {partition['index']} of {parent_id}")
+            if await self.run_partition(partition, payloads[parent_id]):
+                completed += 1
+    
+    async def run_forever(self, idle_interval: float = 10.0):
+        """Worker process loop: keep claiming partitions of any broadcast."""
+        print(f"✅ Broadcast worker {self.owner} started")
+        while True:
+            if not await self.work_on():
+                await asyncio.sleep(idle_interval)
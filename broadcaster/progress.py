@@ -0,0 +1,104 @@
+"""
+#(©)HighTierBots - Live broadcast progress.
+Edits a job's progress message with counters, the current send rate, the
+rate limiter state and an ETA. Edits are throttled by time and run in the
+background, so they never hold up the send pipeline.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from pyrogram import Client
+from pyrogram.errors import FloodWait, MessageNotModified
+
+from broadcaster.engine import BroadcastStats, broadcast_rate_limiter
+
+
+def format_eta(seconds: float) -> str:
+    """Format an ETA as e.g. 2h 05m or 3m 20s."""
+    seconds = int(seconds)
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    return f"{minutes}m {seconds:02d}s"
+
+
+class ProgressReporter:
+    """Throttled editor for one job's progress message."""
+    
+    def __init__(
+        self,
+        client: Client,
+        chat_id: int,
+        message_id: int,
+        title: str,
+        total: int,
+        interval: float
+    ):
+        self.client = client
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.title = title
+        self.total = total
+        self.interval = interval
+        self._next_at = time.monotonic() + interval
+        self._last_processed: Optional[int] = None
+        self._last_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+    
+    def update(self, stats: BroadcastStats):
+        """
+        Schedule a progress edit if the interval has passed.
+        
+        Never awaits: a due edit runs as a background task, and a new one
+        is skipped while the previous edit is still in flight.
+        """
+        now = time.monotonic()
+        if now < self._next_at or (self._task and not self._task.done()):
+            return
+        
+        # Current rate over the last interval (run average for the first edit)
+        if self._last_processed is None or now <= self._last_at:
+            rate = stats.throughput
+        else:
+            rate = max(stats.processed - self._last_processed, 0) / (now - self._last_at)
+        self._last_processed = stats.processed
+        self._last_at = now
+        self._next_at = now + self.interval
+        
+        self._task = asyncio.create_task(self._edit(self.render(stats, rate)))
+    
+    def render(self, stats: BroadcastStats, rate: float) -> str:
+        """Progress message text."""
+        total = max(self.total, stats.processed)
+        percent = (stats.processed / total * 100) if total > 0 else 0
+        remaining = total - stats.processed
+        eta = format_eta(remaining / rate) if rate > 0 else "unknown"
+        return (
+            f"{self.title}\n\n"
+            f"📈 Progress: **{stats.processed}/{total}** ({percent:.1f}%)\n"
+            f"✅ Sent: **{stats.successful}**\n"
+            f"❌ Failed: **{stats.failed}** (🚫 Blocked: {stats.blocked})\n\n"
+            f"🚀 Speed: **{rate:.1f} msg/s**\n"
+            f"🚦 Rate Limiter: {broadcast_rate_limiter.state()}\n"
+            f"⏳ ETA: **{eta}**"
+        )
+    
+    async def _edit(self, text: str):
+        """Edit the message, backing off on FloodWait."""
+        try:
+            await self.client.edit_message_text(self.chat_id, self.message_id, text)
+        except FloodWait as e:
+            self._next_at = time.monotonic() + e.value + self.interval
+        except MessageNotModified:
+            pass
+        except Exception as e:
+            print(f"Error updating broadcast progress message: {e}")
+    
+    async def close(self):
+        """Drop any in-flight edit so it cannot overwrite the final report."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
@@ -0,0 +1,135 @@
+"""
+#(©)HighTierBots - Token bucket rate limiter.
+Shared by all broadcast senders so the bot as a whole stays within
+Telegram's global bot message limit.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in FIFO order."""
+    
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second (sustained messages per second)
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        """Add the tokens accrued since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """
+    Token bucket that adapts its rate to FloodWait signals (AIMD).
+    
+    A FloodWait pauses every sender until it expires and multiplies the
+    rate by `decrease_factor` (once per pause). Each successful send then adds back
+    `increase_per_second / rate`, i.e. about `increase_per_second` msg/s
+    per second of clean sending, up to `max_rate`.
+    
+    `max_rate` and `capacity` are the budget of the whole bot token; when
+    other processes send on the same token, set_shares gives this one its
+    part of it.
+    """
+    
+    def __init__(
+        self,
+        max_rate: float,
+        capacity: float,
+        min_rate: float = 1.0,
+        decrease_factor: float = 0.5,
+        increase_per_second: float = 0.5
+    ):
+        super().__init__(rate=max_rate, capacity=capacity)
+        self.token_rate = max_rate
+        self.token_capacity = capacity
+        self.token_min_rate = min_rate
+        self.shares = 1
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.last_acquired_at: Optional[float] = None
+        self.decrease_factor = decrease_factor
+        self.increase_per_second = increase_per_second
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+        self._paused_until = 0.0
+    
+    @property
+    def paused_for(self) -> float:
+        """Seconds left in the current global pause (0 if not paused)."""
+        return max(0.0, self._paused_until - time.monotonic())
+    
+    def on_flood_wait(self, seconds: float):
+        """Pause all senders for `seconds` and cut the rate."""
+        self.flood_waits += 1
+        self.flood_wait_seconds += seconds
+        # Senders already in flight report the same flood; decrease once
+        if not self.paused_for:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+        print(f"FloodWait: pausing broadcast for {seconds}s, rate now {self.rate:.1f} msg/s")
+    
+    def set_shares(self, shares: int):
+        """Limit this process to 1/shares of the token's rate and burst."""
+        shares = max(1, shares)
+        if shares == self.shares:
+            return
+        self.shares = shares
+        self.max_rate = self.token_rate / shares
+        self.capacity = max(1.0, self.token_capacity / shares)
+        self.min_rate = min(self.token_min_rate, self.max_rate)
+        # A larger share is reached by the usual additive increase
+        self.rate = min(self.rate, self.max_rate)
+        self._tokens = min(self._tokens, self.capacity)
+        print(f"🚦 Broadcast rate share 1/{shares}: up to {self.max_rate:.1f} msg/s")
+    
+    def on_success(self):
+        """Ramp the rate back up after a successful send."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase_per_second / self.rate)
+    
+    def state(self) -> str:
+        """Human-readable limiter state for progress and result messages."""
+        if self.paused_for:
+            return f"paused {self.paused_for:.0f}s (FloodWait), {self.rate:.1f}/{self.max_rate:.0f} msg/s"
+        return f"{self.rate:.1f}/{self.max_rate:.0f} msg/s"
+    
+    async def acquire(self):
+        """Wait out any global pause, then take a token."""
+        self.last_acquired_at = time.monotonic()
+        async with self._lock:
+            while True:
+                pause = self.paused_for
+                if pause:
+                    await asyncio.sleep(pause)
+                    self._updated_at = time.monotonic()
+                    continue
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
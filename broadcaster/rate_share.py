@@ -0,0 +1,71 @@
+"""
+#(©)HighTierBots - Per-token broadcast rate sharing.
+Telegram's message limit applies to a bot token, not to a process. The
+bot and every worker.py sending on the same token register in the
+broadcast_senders collection, and each one limits itself to an equal
+share of BROADCAST_RATE among the processes that are currently sending.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from broadcaster.rate_limiter import AdaptiveRateLimiter
+from database.mongo import MongoOperations
+
+
+class RateShare:
+    """Keeps a rate limiter at its share of the bot token's budget."""
+    
+    def __init__(
+        self,
+        limiter: AdaptiveRateLimiter,
+        bot_token: str,
+        sender_id: str,
+        interval: float = 10.0
+    ):
+        """
+        Args:
+            limiter: This process's broadcast rate limiter
+            bot_token: Token the process sends with (only the bot ID is stored)
+            sender_id: Process identifier
+            interval: Seconds between syncs; senders silent for three
+                intervals no longer count
+        """
+        self.limiter = limiter
+        self.bot_id = bot_token.split(":", 1)[0]
+        self.sender_id = sender_id
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def active(self) -> bool:
+        """Whether this process sent broadcast messages recently."""
+        last = self.limiter.last_acquired_at
+        return last is not None and time.monotonic() - last < self.interval * 3
+    
+    async def sync(self):
+        """Publish this process's state and take its share."""
+        others = await MongoOperations.sync_broadcast_sender(
+            self.sender_id, self.bot_id, self.active, self.interval * 3
+        )
+        if others is not None:
+            # An idle process already counts itself, so it starts at its share
+            self.limiter.set_shares(others + 1)
+    
+    async def _loop(self):
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.interval)
+    
+    def start(self):
+        """Start syncing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+    
+    async def stop(self):
+        """Stop syncing and hand this process's share back."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await MongoOperations.remove_broadcast_sender(self.sender_id)
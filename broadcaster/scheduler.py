@@ -0,0 +1,90 @@
+"""
+#(©)HighTierBots - Broadcast job scheduler.
+Starts queued broadcast jobs when they are due, highest priority first,
+with at most BROADCAST_MAX_ACTIVE_JOBS running at once. All jobs share one
+rate limiter, so they never oversubscribe Telegram's limits together.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from pyrogram import Client
+
+from broadcaster.jobs import (
+    BroadcastJob,
+    STATUS_QUEUED,
+    STATUS_RUNNING,
+    running_jobs,
+    start_job
+)
+from config.config import Config
+from database.mongo import MongoOperations
+
+
+class BroadcastScheduler:
+    """Single asyncio loop that feeds the broadcast queue to start_job."""
+    
+    def __init__(self, max_active_jobs: int, poll_interval: float = 30.0):
+        self.max_active_jobs = max_active_jobs
+        self.poll_interval = poll_interval
+        self.client: Optional[Client] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def wake(self):
+        """Re-check the queue now (new job, resumed job or freed slot)."""
+        self._wake.set()
+    
+    async def _start_due_jobs(self):
+        """Start due jobs until the queue is empty or every slot is busy."""
+        while len(running_jobs) < self.max_active_jobs:
+            record = await MongoOperations.claim_next_broadcast()
+            if record is None:
+                return
+            print(f"▶️ Starting broadcast job {record['_id']} (priority {record.get('priority', 0)})")
+            task = start_job(BroadcastJob(self.client, record))
+            task.add_done_callback(lambda _: self.wake())
+    
+    async def _seconds_until_next(self) -> float:
+        """Time to sleep before the next scheduled job is due."""
+        next_at = await MongoOperations.get_next_scheduled_time()
+        if next_at is None:
+            return self.poll_interval
+        if next_at.tzinfo is None:
+            next_at = next_at.replace(tzinfo=timezone.utc)
+        delay = (next_at - datetime.now(timezone.utc)).total_seconds()
+        return min(max(delay, 0.5), self.poll_interval)
+    
+    async def _loop(self):
+        """Scheduler loop."""
+        while True:
+            self._wake.clear()
+            try:
+                await self._start_due_jobs()
+                delay = await self._seconds_until_next()
+            except Exception as e:
+                print(f"Error in broadcast scheduler: {e}")
+                delay = self.poll_interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def start(self, client: Client):
+        """Requeue jobs interrupted by the last shutdown and start the loop."""
+        self.client = client
+        requeued = await MongoOperations.requeue_broadcasts(STATUS_RUNNING, STATUS_QUEUED)
+        if requeued:
+            print(f"🔄 Requeued {requeued} interrupted broadcast job(s)")
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+    
+    def stop(self):
+        """Stop the scheduler loop (running jobs are stopped separately)."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+broadcast_scheduler = BroadcastScheduler(max_active_jobs=Config.BROADCAST_MAX_ACTIVE_JOBS)
@@ -0,0 +1,77 @@
+"""
+#(©)HighTierBots - Unsend a previous broadcast.
+Deletes a broadcast's messages from every recipient's chat using the
+message IDs stored in broadcast_deliveries. Runs through the same
+rate-limited engine as sending. Telegram only lets bots delete their
+own private-chat messages within 48 hours of sending.
+"""
+
+from typing import AsyncIterator, Dict, List, Optional
+
+from bson import ObjectId
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+
+from database.mongo import MongoOperations
+
+
+class NothingDeleted(Exception):
+    """No message could be deleted in a chat (e.g. past the 48h limit)."""
+
+
+class UnsendPayload:
+    """Engine payload that deletes the stored messages instead of sending."""
+    
+    def __init__(self, target_broadcast_id: ObjectId):
+        self.target_broadcast_id = target_broadcast_id
+        self.text = f"[Unsend of broadcast {target_broadcast_id}]"
+        self._message_ids: Dict[int, List[int]] = {}
+    
+    async def send(self, client: Client, chat_id: int):
+        """
+        Delete every message the broadcast sent to this chat.
+        
+        The chat's IDs are kept after a FloodWait, so the retry deletes
+        them again; any other outcome is final and drops them.
+        
+        Raises:
+            NothingDeleted: If Telegram deleted none of the messages
+        """
+        message_ids = self._message_ids.get(chat_id)
+        if not message_ids:
+            self._message_ids.pop(chat_id, None)
+            raise NothingDeleted(f"no stored messages for chat {chat_id}")
+        try:
+            deleted = await client.delete_messages(chat_id, message_ids)
+        except FloodWait:
+            raise
+        except Exception:
+            self._message_ids.pop(chat_id, None)
+            raise
+        self._message_ids.pop(chat_id, None)
+        if not deleted:
+            raise NothingDeleted(f"0 of {len(message_ids)} messages deleted in chat {chat_id}")
+        return None
+    
+    async def targets(self, after_user_id: Optional[int] = None) -> AsyncIterator[List[int]]:
+        """
+        Stream recipient user IDs of the target broadcast in ascending batches.
+        
+        Their message IDs are kept until each chat has been handled, and
+        duplicate rows (a user re-sent after a crash) are merged.
+        """
+        previous = None
+        async for rows in MongoOperations.iter_broadcast_deliveries(
+            self.target_broadcast_id, after_user_id=after_user_id
+        ):
+            batch = []
+            for row in rows:
+                user_id = row["user_id"]
+                if user_id == previous and user_id in self._message_ids:
+                    self._message_ids[user_id].extend(row.get("message_ids", []))
+                    continue
+                previous = user_id
+                self._message_ids[user_id] = list(row.get("message_ids", []))
+                batch.append(user_id)
+            if batch:
+                yield batch
@@ -20,10 +20,69 @@ class Config:
   OWNER_ID = int(os.getenv("OWNER_ID", 0))
   OWNER_USERNAME = os.getenv("OWNER_USERNAME", "sahilkumardev")
   LOG_GROUP_ID = int(os.environ.get("LOG_GROUP_ID", 0))
+  # Log group messages waiting to be sent; newest are dropped when full
+  LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 1000))
+  # New users per window logged one by one before switching to digests
+  LOG_DIGEST_THRESHOLD = int(os.environ.get("LOG_DIGEST_THRESHOLD", 5))
+  LOG_DIGEST_WINDOW = float(os.environ.get("LOG_DIGEST_WINDOW", 60))
+  # Prometheus /metrics endpoint (port 0 disables it)
+  METRICS_HOST = os.environ.get("METRICS_HOST", "0.0.0.0")
+  METRICS_PORT = int(os.environ.get("METRICS_PORT", 9090))
+  # Event loop lag (seconds) that triggers a stack capture (0 disables)
+  LOOP_LAG_THRESHOLD = float(os.environ.get("LOOP_LAG_THRESHOLD", 0.5))
+  # Minimum seconds between log group reports for the same frame
+  LOOP_STALL_REPORT_INTERVAL = float(os.environ.get("LOOP_STALL_REPORT_INTERVAL", 300))
 
   # ===== DATABASE =====
   DB_URI = os.environ.get("DB_URI", "")
   DB_NAME = os.environ.get("DB_NAME", "highTierBots")
+  # Seconds between background recounts of the user counters in bot_stats
+  COUNTER_RECONCILE_INTERVAL = int(os.environ.get("COUNTER_RECONCILE_INTERVAL", 3600))
+  # Write-behind buffer for /start activity updates
+  ACTIVITY_FLUSH_SIZE = int(os.environ.get("ACTIVITY_FLUSH_SIZE", 500))
+  ACTIVITY_FLUSH_INTERVAL = float(os.environ.get("ACTIVITY_FLUSH_INTERVAL", 5))
+  ACTIVITY_KNOWN_USERS = int(os.environ.get("ACTIVITY_KNOWN_USERS", 100000))
+  # Minimum seconds between last_active writes for an unchanged profile
+  ACTIVITY_WRITE_WINDOW = float(os.environ.get("ACTIVITY_WRITE_WINDOW", 300))
+
+
+  # ===== ANTI-FLOOD =====
+  # Messages per user per sliding window before the user is ignored
+  FLOOD_LIMIT = int(os.environ.get("FLOOD_LIMIT", 5))
+  FLOOD_WINDOW = float(os.environ.get("FLOOD_WINDOW", 10))
+  # Seconds a flooding user's updates are dropped
+  FLOOD_COOLDOWN = float(os.environ.get("FLOOD_COOLDOWN", 30))
+  FLOOD_TRACKED_USERS = int(os.environ.get("FLOOD_TRACKED_USERS", 100000))
+
+
+  # ===== STATS =====
+  # Seconds a /stats snapshot is served before a background refresh
+  STATS_CACHE_TTL = float(os.environ.get("STATS_CACHE_TTL", 60))
+
+
+  # ===== BROADCAST =====
+  # Telegram allows roughly 30 messages/s per bot token across all chats;
+  # the bot and worker.py processes on the same token share this rate
+  BROADCAST_RATE = float(os.environ.get("BROADCAST_RATE", 25))
+  BROADCAST_BURST = float(os.environ.get("BROADCAST_BURST", 25))
+  BROADCAST_CONCURRENCY = int(os.environ.get("BROADCAST_CONCURRENCY", 20))
+  # Lowest rate FloodWait backoff may drop to, and retries per recipient
+  BROADCAST_MIN_RATE = float(os.environ.get("BROADCAST_MIN_RATE", 1))
+  BROADCAST_MAX_RETRIES = int(os.environ.get("BROADCAST_MAX_RETRIES", 3))
+  # Seconds between broadcast job checkpoints
+  BROADCAST_CHECKPOINT_INTERVAL = float(os.environ.get("BROADCAST_CHECKPOINT_INTERVAL", 5))
+  # Minimum seconds between live progress message edits
+  BROADCAST_PROGRESS_INTERVAL = float(os.environ.get("BROADCAST_PROGRESS_INTERVAL", 30))
+  # Broadcast jobs allowed to run at once; they split BROADCAST_CONCURRENCY
+  BROADCAST_MAX_ACTIVE_JOBS = max(1, int(os.environ.get("BROADCAST_MAX_ACTIVE_JOBS", 1)))
+  BROADCAST_JOB_CONCURRENCY = max(1, BROADCAST_CONCURRENCY // BROADCAST_MAX_ACTIVE_JOBS)
+  # Split broadcasts into user_id partitions for worker.py processes (1 = off)
+  BROADCAST_PARTITIONS = int(os.environ.get("BROADCAST_PARTITIONS", 1))
+  BROADCAST_LEASE_SECONDS = float(os.environ.get("BROADCAST_LEASE_SECONDS", 60))
+  # Days per-recipient delivery rows are kept (TTL index)
+  DELIVERY_LOG_TTL_DAYS = int(os.environ.get("DELIVERY_LOG_TTL_DAYS", 30))
+  # Optional separate bot token for worker.py (defaults to BOT_TOKEN)
+  WORKER_BOT_TOKEN = os.environ.get("WORKER_BOT_TOKEN", "")
 
 
   # ===== VALIDATION =====
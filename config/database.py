@@ -3,12 +3,31 @@ MongoDB database connection and initialization.
 """
 
 import sys
-from pymongo import MongoClient, ASCENDING
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
 from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
 from config.config import Config
 
+# Broadcast audience indexes (ESR order: equality, sort on user_id, then the
+# range filters), so filtered audience streams are covered by index keys
+AUDIENCE_INDEX = [
+  ("is_blocked", ASCENDING),
+  ("user_id", ASCENDING),
+  ("last_active", ASCENDING),
+  ("joined_at", ASCENDING),
+  ("interaction_count", ASCENDING)
+]
+AUDIENCE_LANGUAGE_INDEX = [
+  ("is_blocked", ASCENDING),
+  ("language_code", ASCENDING),
+  ("user_id", ASCENDING),
+  ("last_active", ASCENDING),
+  ("joined_at", ASCENDING),
+  ("interaction_count", ASCENDING)
+]
+
 class Database:
-  """MongoDB database connection handler."""
+  """MongoDB database connection handler (Motor, asyncio)."""
   
   _instance = None
   _client = None
@@ -26,39 +45,73 @@ class Database:
       self.connect()
   
   def connect(self):
-    """Establish connection to MongoDB."""
+    """
+    Create the Motor client.
+    
+    No network I/O happens here; the connection is verified by
+    `initialize()` once the event loop is running.
+    """
     try:
-      print(f"🔄 Connecting to MongoDB...")
-      self._client = MongoClient(
+      self._client = AsyncIOMotorClient(
         Config.DB_URI,
         serverSelectionTimeoutMS=5000,
         connectTimeoutMS=5000
       )
-      
-      self._client.admin.command('ping')
-      
       self._db = self._client[Config.DB_NAME]
+    except Exception as e:
+      print(f"❌ Unexpected database error: {e}")
+      sys.exit(1)
+  
+  async def initialize(self):
+    """Verify the connection and create indexes. Call once on startup."""
+    try:
+      print(f"🔄 Connecting to MongoDB...")
+      await self._client.admin.command('ping')
       print(f"✅ Connected to MongoDB: {Config.DB_NAME}")
       
-      self.create_indexes()
+      await self.create_indexes()
         
     except (ConnectionFailure, ServerSelectionTimeoutError) as e:
       print(f"❌ Failed to connect to MongoDB: {e}")
       print("Please ensure MongoDB is running and the connection string is correct.")
-      sys.exit(1)
-    except Exception as e:
-      print(f"❌ Unexpected database error: {e}")
-      sys.exit(1)
+      raise
   
-  def create_indexes(self):
+  async def create_indexes(self):
     """Create database indexes for better query performance."""
     try:
       users = self._db.users
         
-      users.create_index([("user_id", ASCENDING)], unique=True)
-      users.create_index([("joined_at", ASCENDING)])
-      users.create_index([("last_active", ASCENDING)])
-      users.create_index([("is_blocked", ASCENDING)])
+      await users.create_index([("user_id", ASCENDING)], unique=True)
+      await users.create_index([("joined_at", ASCENDING)])
+      await users.create_index([("last_active", ASCENDING)])
+      # Serves is_blocked lookups and covers the broadcast audience stream;
+      # its (is_blocked, user_id) prefix replaces the former two-key index
+      await users.create_index(AUDIENCE_INDEX)
+      await users.create_index(AUDIENCE_LANGUAGE_INDEX)
+      
+      await self._db.daily_stats.create_index([("date", ASCENDING)])
+      await self._db.broadcasts.create_index([("status", ASCENDING), ("sent_at", ASCENDING)])
+      await self._db.broadcasts.create_index(
+        [("status", ASCENDING), ("priority", DESCENDING), ("scheduled_at", ASCENDING)]
+      )
+      
+      partitions = self._db.broadcast_partitions
+      await partitions.create_index([("broadcast_id", ASCENDING), ("index", ASCENDING)], unique=True)
+      await partitions.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+      
+      await self._db.broadcast_senders.create_index(
+        [("seen_at", ASCENDING)], expireAfterSeconds=3600
+      )
+      
+      deliveries = self._db.broadcast_deliveries
+      await deliveries.create_index([("broadcast_id", ASCENDING), ("user_id", ASCENDING)])
+      await deliveries.create_index(
+        [("broadcast_id", ASCENDING), ("outcome", ASCENDING), ("user_id", ASCENDING)]
+      )
+      await deliveries.create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=Config.DELIVERY_LOG_TTL_DAYS * 86400
+      )
       
       print("✅ Database indexes created successfully")
     except Exception as e:
@@ -85,6 +138,26 @@ class Database:
   def broadcasts(self):
     """Get broadcasts collection."""
     return self.db.broadcasts
+
+  @property
+  def broadcast_partitions(self):
+    """Get broadcast_partitions collection."""
+    return self.db.broadcast_partitions
+
+  @property
+  def broadcast_deliveries(self):
+    """Get broadcast_deliveries collection."""
+    return self.db.broadcast_deliveries
+
+  @property
+  def broadcast_senders(self):
+    """Get broadcast_senders collection (processes sharing a bot's rate)."""
+    return self.db.broadcast_senders
+
+  @property
+  def daily_stats(self):
+    """Get daily_stats rollup collection."""
+    return self.db.daily_stats
   
   def close(self):
     """Close database connection."""
@@ -0,0 +1,149 @@
+"""
+#(©)HighTierBots - Write-behind buffer for user activity updates.
+Repeated /start updates for known users are merged in memory and flushed
+to MongoDB as unordered bulk_write batches. Unchanged profiles and
+last_active refreshes inside ACTIVITY_WRITE_WINDOW are reduced to a
+plain interaction_count increment.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from config.config import Config
+from database.mongo import MongoOperations
+
+
+PROFILE_FIELDS = ("username", "first_name", "last_name", "language_code", "is_bot")
+
+
+class ActivityBuffer:
+  """Merges per-user activity updates and flushes them in batches."""
+  
+  def __init__(
+    self,
+    flush_size: int,
+    flush_interval: float,
+    max_known_users: int,
+    write_window: float
+  ):
+    self.flush_size = flush_size
+    self.flush_interval = flush_interval
+    self.max_known_users = max_known_users
+    self.write_window = write_window
+    self._pending: Dict[int, dict] = {}
+    # user_id -> (monotonic time last_active was written, profile hash)
+    self._known: "OrderedDict[int, Tuple[float, int]]" = OrderedDict()
+    self._lock = asyncio.Lock()
+    self._task: Optional[asyncio.Task] = None
+    self._flushes = set()
+  
+  def _remember(self, user_id: int, written_at: float, profile_hash: int):
+    """Store a user's write watermark, evicting the least recently seen."""
+    self._known[user_id] = (written_at, profile_hash)
+    self._known.move_to_end(user_id)
+    if len(self._known) > self.max_known_users:
+      self._known.popitem(last=False)
+  
+  def _merge(self, user_id: int, fields: dict, inc: int):
+    """Merge an update into the pending entry for a user."""
+    entry = self._pending.get(user_id)
+    if entry is None:
+      self._pending[user_id] = {"set": dict(fields), "inc": inc}
+    else:
+      entry["set"].update(fields)
+      entry["inc"] += inc
+  
+  async def record(self, user_data: dict) -> Optional[bool]:
+    """
+    Record a user interaction.
+    
+    Unknown users are upserted immediately so new users are visible at
+    once; known users are buffered until the next flush.
+    
+    Args:
+        user_data: Dictionary containing user information
+        
+    Returns:
+        True if the user is new, False if it already existed,
+        None if the immediate upsert failed
+    """
+    user_id = user_data.get("user_id")
+    profile = {field: user_data.get(field) for field in PROFILE_FIELDS}
+    profile_hash = hash(tuple(profile.values()))
+    now = time.monotonic()
+    watermark = self._known.get(user_id)
+    
+    if watermark is None:
+      is_new = await MongoOperations.upsert_user(user_data)
+      if is_new is not None:
+        self._remember(user_id, now, profile_hash)
+      return is_new
+    
+    written_at, known_hash = watermark
+    fields = {}
+    if profile_hash != known_hash:
+      fields.update(profile)
+    if fields or now - written_at >= self.write_window:
+      fields["last_active"] = datetime.now(timezone.utc)
+      written_at = now
+    
+    self._remember(user_id, written_at, profile_hash)
+    self._merge(user_id, fields, 1)
+    
+    if len(self._pending) >= self.flush_size and not self._lock.locked():
+      task = asyncio.create_task(self.flush())
+      self._flushes.add(task)
+      task.add_done_callback(self._flushes.discard)
+    return False
+  
+  async def flush(self) -> int:
+    """
+    Write all pending updates to MongoDB.
+    
+    Returns:
+        Number of user documents modified
+    """
+    async with self._lock:
+      if not self._pending:
+        return 0
+      batch, self._pending = self._pending, {}
+      try:
+        return await MongoOperations.bulk_update_user_activity(batch)
+      except Exception as e:
+        print(f"Error flushing activity buffer ({len(batch)} users): {e}")
+        # Requeue under newer updates that arrived during the flush
+        for user_id, entry in batch.items():
+          newer = self._pending.pop(user_id, None)
+          self._pending[user_id] = entry
+          if newer:
+            self._merge(user_id, newer["set"], newer["inc"])
+        return 0
+  
+  async def _flush_loop(self):
+    """Flush pending updates every flush_interval seconds."""
+    while True:
+      await asyncio.sleep(self.flush_interval)
+      await self.flush()
+  
+  def start(self):
+    """Start the periodic flush task."""
+    if self._task is None:
+      self._task = asyncio.create_task(self._flush_loop())
+  
+  async def stop(self):
+    """Stop the periodic flush task and flush everything still pending."""
+    if self._task is not None:
+      self._task.cancel()
+      self._task = None
+    await self.flush()
+
+
+activity_buffer = ActivityBuffer(
+  flush_size=Config.ACTIVITY_FLUSH_SIZE,
+  flush_interval=Config.ACTIVITY_FLUSH_INTERVAL,
+  max_known_users=Config.ACTIVITY_KNOWN_USERS,
+  write_window=Config.ACTIVITY_WRITE_WINDOW
+)
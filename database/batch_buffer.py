@@ -0,0 +1,73 @@
+"""
+#(©)HighTierBots - Base class for batched background writes.
+Items are appended in memory and written in batches by a subclass. A
+full buffer flushes in the background; a failed write keeps the
+unwritten items queued for the next flush.
+"""
+
+import asyncio
+from typing import Any, List
+
+
+class BatchBuffer:
+    """Buffers items and writes them in batches of `batch_size`."""
+    
+    # Plural noun for error messages, e.g. "broadcast deliveries"
+    items_name = "items"
+    
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+        self._items: List[Any] = []
+        self._lock = asyncio.Lock()
+        self._flushes = set()
+    
+    async def _write(self, batch: List[Any]) -> int:
+        """Write one batch and return the number written (raises on failure)."""
+        raise NotImplementedError
+    
+    def _unwritten(self, batch: List[Any], error: Exception) -> List[Any]:
+        """Items of a failed batch that must be written again (all by default)."""
+        return batch
+    
+    @property
+    def pending(self) -> int:
+        """Items not written yet."""
+        return len(self._items)
+    
+    def _add(self, item: Any):
+        """Buffer one item; starts a background flush when full."""
+        self._items.append(item)
+        if len(self._items) >= self.batch_size and not self._lock.locked():
+            task = asyncio.create_task(self._flush_in_background())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+    
+    async def flush(self) -> int:
+        """
+        Write every buffered item. Returns the number written.
+        
+        On failure the unwritten items are requeued ahead of newer ones
+        and the error is raised, so callers do not checkpoint past them.
+        """
+        async with self._lock:
+            if not self._items:
+                return 0
+            items, self._items = self._items, []
+            written = 0
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start:start + self.batch_size]
+                try:
+                    written += await self._write(batch)
+                except Exception as e:
+                    unwritten = self._unwritten(batch, e) + items[start + self.batch_size:]
+                    print(f"Error writing {len(unwritten)} {self.items_name}: {e}")
+                    self._items[:0] = unwritten
+                    raise
+            return written
+    
+    async def _flush_in_background(self):
+        """Size-triggered flush; failures are left for the next flush."""
+        try:
+            await self.flush()
+        except Exception:
+            pass
@@ -0,0 +1,23 @@
+"""
+#(©)HighTierBots - Batched blocked-user marking.
+Users found to have blocked the bot during a broadcast are collected and
+marked with update_many/$in batches in the background.
+"""
+
+from typing import List
+
+from database.batch_buffer import BatchBuffer
+from database.mongo import MongoOperations
+
+
+class BlockedUserBuffer(BatchBuffer):
+    """Collects blocked user IDs and marks them in batches."""
+    
+    items_name = "blocked users"
+    
+    def add(self, user_id: int):
+        """Queue a user to be marked blocked; flushes in the background when full."""
+        self._add(user_id)
+    
+    async def _write(self, batch: List[int]) -> int:
+        return await MongoOperations.mark_users_blocked(batch)
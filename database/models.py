@@ -3,7 +3,7 @@
 """
 
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Optional
 
 
 class User:
@@ -46,7 +46,7 @@ class User:
 
 
 class Broadcast:
-    """Broadcast model for MongoDB."""
+    """Broadcast model for MongoDB (also the durable broadcast job record)."""
     
     def __init__(
         self,
@@ -54,7 +54,19 @@ class Broadcast:
         sent_by: int,
         total_recipients: int,
         successful: int,
-        failed: int
+        failed: int,
+        blocked: int = 0,
+        status: str = "completed",
+        payload: Optional[dict] = None,
+        last_user_id: Optional[int] = None,
+        progress_chat_id: Optional[int] = None,
+        progress_message_id: Optional[int] = None,
+        partitions: int = 0,
+        kind: str = "broadcast",
+        target_broadcast_id: Optional[Any] = None,
+        priority: int = 0,
+        scheduled_at: Optional[datetime] = None,
+        audience: Optional[dict] = None
     ):
         self.message = message
         self.sent_by = sent_by
@@ -62,6 +74,18 @@ class Broadcast:
         self.total_recipients = total_recipients
         self.successful = successful
         self.failed = failed
+        self.blocked = blocked
+        self.status = status
+        self.payload = payload
+        self.last_user_id = last_user_id
+        self.progress_chat_id = progress_chat_id
+        self.progress_message_id = progress_message_id
+        self.partitions = partitions
+        self.kind = kind
+        self.target_broadcast_id = target_broadcast_id
+        self.priority = priority
+        self.scheduled_at = scheduled_at or self.sent_at
+        self.audience = audience
     
     def to_dict(self):
         """Convert broadcast object to dictionary for MongoDB."""
@@ -71,7 +95,19 @@ class Broadcast:
             "sent_at": self.sent_at,
             "total_recipients": self.total_recipients,
             "successful": self.successful,
-            "failed": self.failed
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "status": self.status,
+            "payload": self.payload,
+            "last_user_id": self.last_user_id,
+            "progress_chat_id": self.progress_chat_id,
+            "progress_message_id": self.progress_message_id,
+            "partitions": self.partitions,
+            "kind": self.kind,
+            "target_broadcast_id": self.target_broadcast_id,
+            "priority": self.priority,
+            "scheduled_at": self.scheduled_at,
+            "audience": self.audience
         }
 
 
@@ -90,3 +126,36 @@ class BotStats:
             "bot_started_at": self.bot_started_at,
             "last_updated": self.last_updated
         }
+
+
+class UserStats:
+    """User statistics snapshot computed for /stats."""
+    
+    def __init__(
+        self,
+        total_users: int = 0,
+        blocked_users: int = 0,
+        active_users_24h: int = 0,
+        new_users_today: int = 0,
+        new_users_week: int = 0,
+        new_users_month: int = 0
+    ):
+        self.total_users = total_users
+        self.blocked_users = blocked_users
+        self.active_users_24h = active_users_24h
+        self.new_users_today = new_users_today
+        self.new_users_week = new_users_week
+        self.new_users_month = new_users_month
+        self.computed_at = datetime.now(timezone.utc)
+    
+    def to_dict(self):
+        """Convert user stats object to dictionary."""
+        return {
+            "total_users": self.total_users,
+            "blocked_users": self.blocked_users,
+            "active_users_24h": self.active_users_24h,
+            "new_users_today": self.new_users_today,
+            "new_users_week": self.new_users_week,
+            "new_users_month": self.new_users_month,
+            "computed_at": self.computed_at
+        }
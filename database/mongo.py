@@ -1,82 +1,410 @@
 """
 #(©)HighTierBots - MongoDB operations and database queries.
+All operations are coroutines backed by Motor and must be awaited.
 """
 
-from config.database import db
-from typing import List, Optional
+import asyncio
+from config.database import db, AUDIENCE_INDEX, AUDIENCE_LANGUAGE_INDEX
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from database.models import UserStats
+from utils.helpers import get_time_periods
+from utils.metrics import instrument_operations
+
+
+# Oversampling factor for partition boundaries ($sample runs before
+# the audience filter, which drops part of the sample)
+BOUNDARY_OVERSAMPLE = 4
+
+
+def _user_upsert_update(user_data: dict) -> dict:
+  """Build the update document used to add or refresh a user."""
+  now = datetime.now(timezone.utc)
+  return {
+    "$set": {
+      "username": user_data.get("username"),
+      "first_name": user_data.get("first_name", ""),
+      "last_name": user_data.get("last_name"),
+      "language_code": user_data.get("language_code", "en"),
+      "is_bot": user_data.get("is_bot", False),
+      "last_active": now,
+    },
+    "$setOnInsert": {
+      "joined_at": now,
+      "is_blocked": False
+    },
+    "$inc": {"interaction_count": 1}
+  }
+
+
+def _day_start(moment: Optional[datetime] = None) -> datetime:
+  """Get midnight UTC of the day containing `moment` (default: now)."""
+  moment = moment or datetime.now(timezone.utc)
+  return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _as_utc(moment: Optional[datetime]) -> datetime:
+  """Treat naive datetimes read back from MongoDB as UTC."""
+  if moment is None:
+    return datetime.min.replace(tzinfo=timezone.utc)
+  if moment.tzinfo is None:
+    return moment.replace(tzinfo=timezone.utc)
+  return moment
+
+
+def _audience_query(audience: Optional[dict] = None) -> dict:
+  """
+  Build the users query for a broadcast audience.
+  
+  Args:
+      audience: Optional filters - language_codes (list), active_since and
+          joined_since (datetimes), min_interactions (int)
+  """
+  query = {"is_blocked": False}
+  audience = audience or {}
+  if audience.get("language_codes"):
+    query["language_code"] = {"$in": audience["language_codes"]}
+  if audience.get("active_since"):
+    query["last_active"] = {"$gte": audience["active_since"]}
+  if audience.get("joined_since"):
+    query["joined_at"] = {"$gte": audience["joined_since"]}
+  if audience.get("min_interactions"):
+    query["interaction_count"] = {"$gte": audience["min_interactions"]}
+  return query
+
+
+def _audience_index(audience: Optional[dict] = None) -> list:
+  """Pick the compound index that covers an audience query."""
+  if audience and audience.get("language_codes"):
+    return AUDIENCE_LANGUAGE_INDEX
+  return AUDIENCE_INDEX
 
 
 class MongoOperations:
     """Database operations handler."""
     
     @staticmethod
-    def add_or_update_user(user_data: dict) -> bool:
+    async def upsert_user(user_data: dict) -> Optional[bool]:
       """
-      Add a new user or update existing user information.
+      Add or update a user in one atomic round trip and report if it was new.
+      
+      Uses find_one_and_update with the pre-image, so two concurrent
+      /starts for the same user can never both see it as new.
       
       Args:
           user_data: Dictionary containing user information
           
       Returns:
-          True if successful, False otherwise
+          True if the user was inserted, False if it already existed,
+          None if the write failed
+      """
+      user_id = user_data.get("user_id")
+      update = _user_upsert_update(user_data)
+      
+      for attempt in range(2):
+        try:
+          previous = await db.users.find_one_and_update(
+            {"user_id": user_id},
+            update,
+            projection={"_id": 1, "last_active": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+          )
+          if previous is None:
+            await MongoOperations._inc_user_counters(total=1)
+            await MongoOperations._inc_daily_stats(
+              new_users=1, active_users=1, interactions=1
+            )
+            return True
+          
+          first_today = _as_utc(previous.get("last_active")) < _day_start()
+          await MongoOperations._inc_daily_stats(
+            active_users=int(first_today), interactions=1
+          )
+          return False
+        except DuplicateKeyError:
+          # A concurrent upsert inserted the user first; retry as update
+          if attempt:
+            return False
+        except Exception as e:
+          print(f"Error upserting user: {e}")
+          return None
+      return None
+  
+    @staticmethod
+    async def bulk_update_user_activity(updates: Dict[int, dict]) -> int:
+      """
+      Apply buffered activity updates for existing users in one bulk_write.
+      
+      Users whose last_active moves into the current UTC day are counted
+      once as active in daily_stats, together with the batch interactions.
+      
+      Args:
+          updates: Mapping of user_id to {"set": dict, "inc": int};
+              an empty "set" only increments interaction_count
+          
+      Returns:
+          Number of modified user documents
+          
+      Raises on failure so the caller can requeue the batch.
       """
+      if not updates:
+        return 0
+      
+      day_start = _day_start()
+      rollover = [
+        UpdateOne(
+          {"user_id": user_id, "last_active": {"$lt": day_start}},
+          {"$set": {"last_active": update["set"]["last_active"]}}
+        )
+        for user_id, update in updates.items()
+        if "last_active" in update["set"]
+      ]
+      newly_active = 0
+      if rollover:
+        rolled = await db.users.bulk_write(rollover, ordered=False)
+        newly_active = rolled.modified_count
+      
+      operations = []
+      for user_id, update in updates.items():
+        change = {"$inc": {"interaction_count": update["inc"]}}
+        if update["set"]:
+          change["$set"] = update["set"]
+        operations.append(UpdateOne({"user_id": user_id}, change))
+      result = await db.users.bulk_write(operations, ordered=False)
+      
+      await MongoOperations._inc_daily_stats(
+        active_users=newly_active,
+        interactions=sum(update["inc"] for update in updates.values())
+      )
+      return result.modified_count
+  
+    @staticmethod
+    async def get_user(user_id: int) -> Optional[dict]:
+      """Get user by user ID."""
       try:
-        user_id = user_data.get("user_id")
-        
-        db.users.update_one(
-          {"user_id": user_id},
+        return await db.users.find_one({"user_id": user_id})
+      except Exception as e:
+        print(f"Error getting user: {e}")
+        return None
+  
+    @staticmethod
+    async def get_total_users() -> int:
+      """
+      Get total number of users.
+      
+      Reads the counter kept in bot_stats; only falls back to a full
+      count_documents before the counters have been reconciled once.
+      """
+      try:
+        stats = await db.bot_stats.find_one({}, {"total_users": 1, "_id": 0})
+        if stats and "total_users" in stats:
+          return stats["total_users"]
+        return await db.users.count_documents({})
+      except Exception as e:
+        print(f"Error getting total users: {e}")
+        return 0
+  
+    @staticmethod
+    async def get_user_counters() -> dict:
+      """
+      Get the maintained user counters.
+      
+      Returns:
+          Dictionary with total_users, blocked_users and active_users
+          
+      Raises on failure; callers decide what a missing count means.
+      """
+      stats = await db.bot_stats.find_one(
+        {}, {"total_users": 1, "blocked_users": 1, "_id": 0}
+      ) or {}
+      if "total_users" not in stats:
+        return await MongoOperations.reconcile_user_counters()
+      total = stats.get("total_users", 0)
+      blocked = stats.get("blocked_users", 0)
+      return {
+        "total_users": total,
+        "blocked_users": blocked,
+        "active_users": max(total - blocked, 0)
+      }
+  
+    @staticmethod
+    async def count_audience(audience: Optional[dict] = None) -> Optional[int]:
+      """
+      Estimate the number of recipients for a broadcast audience.
+      
+      Without filters this is the maintained active_users counter; with
+      filters the count runs on the covering audience index. Users may
+      join, leave or go idle before the broadcast runs, so the figure is
+      an estimate.
+      
+      Returns:
+          The estimate, or None if it could not be computed (error or
+          timeout), which is not the same as an empty audience
+      """
+      try:
+        if not audience:
+          return (await MongoOperations.get_user_counters())["active_users"]
+        return await db.users.count_documents(
+          _audience_query(audience),
+          hint=_audience_index(audience),
+          maxTimeMS=10000
+        )
+      except Exception as e:
+        print(f"Error counting audience: {e}")
+        return None
+  
+    @staticmethod
+    async def reconcile_user_counters() -> dict:
+      """
+      Recompute the user counters with real counts and store them.
+      
+      Corrects any drift from failed or lost increments. Runs periodically
+      in the background, never on a request path.
+      
+      Returns:
+          Dictionary with total_users, blocked_users and active_users
+      """
+      try:
+        total = await db.users.count_documents({})
+        blocked = await db.users.count_documents({"is_blocked": True})
+        await db.bot_stats.update_one(
+          {},
           {
             "$set": {
-              "username": user_data.get("username"),
-              "first_name": user_data.get("first_name", ""),
-              "last_name": user_data.get("last_name"),
-              "language_code": user_data.get("language_code", "en"),
-              "is_bot": user_data.get("is_bot", False),
-              "last_active": datetime.now(timezone.utc),
-            },
-            "$setOnInsert": {
-              "joined_at": datetime.now(timezone.utc),
-              "is_blocked": False
-            },
-            "$inc": {"interaction_count": 1}
+              "total_users": total,
+              "blocked_users": blocked,
+              "counters_reconciled_at": datetime.now(timezone.utc)
+            }
           },
           upsert=True
         )
-        return True
+        return {
+          "total_users": total,
+          "blocked_users": blocked,
+          "active_users": max(total - blocked, 0)
+        }
       except Exception as e:
-        print(f"Error adding/updating user: {e}")
-        return False
+        print(f"Error reconciling user counters: {e}")
+        return {"total_users": 0, "blocked_users": 0, "active_users": 0}
   
     @staticmethod
-    def get_user(user_id: int) -> Optional[dict]:
-      """Get user by user ID."""
+    async def _inc_user_counters(total: int = 0, blocked: int = 0):
+      """Atomically bump the user counters in bot_stats."""
       try:
-        return db.users.find_one({"user_id": user_id})
+        await db.bot_stats.update_one(
+          {},
+          {"$inc": {"total_users": total, "blocked_users": blocked}},
+          upsert=True
+        )
       except Exception as e:
-        print(f"Error getting user: {e}")
-        return None
+        print(f"Error updating user counters: {e}")
+
+    @staticmethod
+    async def _inc_daily_stats(**fields: int):
+      """
+      Atomically bump today's daily_stats rollup document.
+      
+      Callers only pass increments derived from state transitions in the
+      users collection (insert, first activity of the day, block), so
+      retries and restarts never count the same event twice.
+      """
+      fields = {name: value for name, value in fields.items() if value}
+      if not fields:
+        return
+      try:
+        day_start = _day_start()
+        await db.daily_stats.update_one(
+          {"_id": day_start.strftime("%Y-%m-%d")},
+          {"$inc": fields, "$setOnInsert": {"date": day_start}},
+          upsert=True
+        )
+      except Exception as e:
+        print(f"Error updating daily stats: {e}")
   
     @staticmethod
-    def is_user_new(user_id: int) -> bool:
-      """Check if user is new (not in database)."""
-      return db.users.find_one({"user_id": user_id}) is None
+    async def get_daily_stats(days: int = 30) -> List[dict]:
+      """
+      Get the daily_stats rollup for the last `days` UTC days, newest first.
+      
+      Args:
+          days: Number of days including today
+          
+      Raises on failure, so /stats keeps its cached snapshot.
+      """
+      since = _day_start() - timedelta(days=days - 1)
+      cursor = db.daily_stats.find({"date": {"$gte": since}}).sort("date", -1)
+      return await cursor.to_list(length=days)
   
     @staticmethod
-    def get_total_users() -> int:
-      """Get total number of users."""
+    async def backfill_daily_stats() -> int:
+      """
+      Rebuild daily_stats from the users collection (one-off job).
+      
+      New users are grouped by joined_at, active users by last_active and
+      blocked users by blocked_at. Values are merged with $max, so the
+      job can be re-run safely and never lowers live counts.
+      
+      Returns:
+          Number of daily documents written
+      """
+      def by_day(field: str, match: dict) -> list:
+        return [
+          {"$match": match},
+          {
+            "$group": {
+              "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${field}"}},
+              "count": {"$sum": 1}
+            }
+          }
+        ]
+      
       try:
-        return db.users.count_documents({})
+        days: Dict[str, dict] = {}
+        sources = (
+          ("new_users", "joined_at", {"joined_at": {"$type": "date"}}),
+          ("active_users", "last_active", {"last_active": {"$type": "date"}}),
+          ("blocked_users", "blocked_at", {"is_blocked": True, "blocked_at": {"$type": "date"}})
+        )
+        for name, field, match in sources:
+          async for row in db.users.aggregate(by_day(field, match), allowDiskUse=True):
+            days.setdefault(row["_id"], {})[name] = row["count"]
+        
+        operations = [
+          UpdateOne(
+            {"_id": day},
+            {
+              "$max": counts,
+              "$setOnInsert": {
+                "date": datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+              }
+            },
+            upsert=True
+          )
+          for day, counts in days.items()
+        ]
+        if operations:
+          await db.daily_stats.bulk_write(operations, ordered=False)
+        
+        await db.bot_stats.update_one(
+          {},
+          {"$set": {"daily_stats_backfilled_at": datetime.now(timezone.utc)}},
+          upsert=True
+        )
+        return len(operations)
       except Exception as e:
-        print(f"Error getting total users: {e}")
+        print(f"Error backfilling daily stats: {e}")
         return 0
-
+  
     @staticmethod
-    def get_active_users(hours: int = 24) -> int:
+    async def get_active_users(hours: int = 24) -> int:
       """Get number of active users in the last X hours."""
       try:
         time_threshold = datetime.now(timezone.utc) - timedelta(hours=hours)
-        return db.users.count_documents({
+        return await db.users.count_documents({
           "last_active": {"$gte": time_threshold}
         })
       except Exception as e:
@@ -84,11 +412,11 @@ class MongoOperations:
         return 0
   
     @staticmethod
-    def get_new_users_since(days: int) -> int:
+    async def get_new_users_since(days: int) -> int:
         """Get number of new users since X days ago."""
         try:
             time_threshold = datetime.now(timezone.utc) - timedelta(days=days)
-            return db.users.count_documents({
+            return await db.users.count_documents({
                 "joined_at": {"$gte": time_threshold}
             })
         except Exception as e:
@@ -96,42 +424,638 @@ class MongoOperations:
             return 0
     
     @staticmethod
-    def get_all_user_ids(exclude_blocked: bool = True) -> List[int]:
-      """Get all user IDs for broadcasting."""
+    async def get_user_stats() -> UserStats:
+      """
+      Compute every /stats time window.
+      
+      Once daily_stats has been backfilled, the new-user windows are summed
+      from at most 30 rollup documents (calendar days, today included) and
+      only the 24h active count touches users. Before that, each window is
+      a single-field range count on the joined_at/last_active indexes
+      (an index-only COUNT_SCAN, no documents fetched), run concurrently.
+      Totals always come from the bot_stats counters.
+      
+      Returns:
+          UserStats with the total, blocked, active and new-user counts
+          
+      Raises on failure (instead of returning zeros) so a cached snapshot
+      is kept rather than replaced by empty stats.
+      """
+      counters = await MongoOperations.get_user_counters()
+      stats = await db.bot_stats.find_one(
+        {}, {"daily_stats_backfilled_at": 1, "_id": 0}
+      ) or {}
+      active_since = datetime.now(timezone.utc) - timedelta(hours=24)
+      
+      if stats.get("daily_stats_backfilled_at"):
+        today = _day_start()
+        daily = await MongoOperations.get_daily_stats(days=30)
+        
+        def new_since(days: int) -> int:
+          since = today - timedelta(days=days - 1)
+          return sum(
+            doc.get("new_users", 0) for doc in daily
+            if _as_utc(doc["date"]) >= since
+          )
+        
+        return UserStats(
+          total_users=counters["total_users"],
+          blocked_users=counters["blocked_users"],
+          active_users_24h=await db.users.count_documents({"last_active": {"$gte": active_since}}),
+          new_users_today=new_since(1),
+          new_users_week=new_since(7),
+          new_users_month=new_since(30)
+        )
+      
+      periods = get_time_periods()
+      active_24h, new_today, new_week, new_month = await asyncio.gather(
+        db.users.count_documents({"last_active": {"$gte": active_since}}),
+        db.users.count_documents({"joined_at": {"$gte": periods["today_start"]}}),
+        db.users.count_documents({"joined_at": {"$gte": periods["week_start"]}}),
+        db.users.count_documents({"joined_at": {"$gte": periods["month_start"]}})
+      )
+      
+      return UserStats(
+        total_users=counters["total_users"],
+        blocked_users=counters["blocked_users"],
+        active_users_24h=active_24h,
+        new_users_today=new_today,
+        new_users_week=new_week,
+        new_users_month=new_month
+      )
+    
+    @staticmethod
+    async def iter_user_ids(
+      exclude_blocked: bool = True,
+      batch_size: int = 1000,
+      after_user_id: Optional[int] = None,
+      until_user_id: Optional[int] = None,
+      audience: Optional[dict] = None
+    ) -> AsyncIterator[List[int]]:
+      """
+      Stream user IDs for broadcasting in ascending batches.
+      
+      The query (including any audience filters) is covered by one of the
+      audience indexes, so only index keys are read and memory stays flat
+      for any audience size.
+      
+      Args:
+          exclude_blocked: Skip users who blocked the bot
+          batch_size: Number of user IDs per yielded batch
+          after_user_id: Only yield IDs greater than this (for resuming)
+          until_user_id: Only yield IDs up to and including this
+          audience: Optional audience filters (see _audience_query)
+          
+      Yields:
+          Lists of user IDs
+      """
+      query = _audience_query(audience) if exclude_blocked else {}
+      id_range = {}
+      if after_user_id is not None:
+        id_range["$gt"] = after_user_id
+      if until_user_id is not None:
+        id_range["$lte"] = until_user_id
+      if id_range:
+        query["user_id"] = id_range
+      
+      cursor = db.users.find(query, {"user_id": 1, "_id": 0}).sort(
+        "user_id", ASCENDING
+      ).batch_size(batch_size)
+      if exclude_blocked:
+        cursor = cursor.hint(_audience_index(audience))
+      
+      batch = []
+      async for user in cursor:
+        batch.append(user["user_id"])
+        if len(batch) >= batch_size:
+          yield batch
+          batch = []
+      if batch:
+        yield batch
+  
+    @staticmethod
+    async def mark_users_blocked(user_ids: List[int]) -> int:
+      """
+      Mark many users as blocked with one update_many over $in.
+      
+      Only users not already blocked are modified, and the counters are
+      bumped by exactly that number.
+      
+      Returns:
+          Number of users newly marked as blocked
+          
+      Raises on failure so the caller can requeue the batch.
+      """
+      if not user_ids:
+        return 0
+      result = await db.users.update_many(
+        {"user_id": {"$in": user_ids}, "is_blocked": False},
+        {"$set": {"is_blocked": True, "blocked_at": datetime.now(timezone.utc)}}
+      )
+      if result.modified_count:
+        await MongoOperations._inc_user_counters(blocked=result.modified_count)
+        await MongoOperations._inc_daily_stats(blocked_users=result.modified_count)
+      return result.modified_count
+    
+    @staticmethod
+    async def create_broadcast(broadcast_data: dict) -> Optional[ObjectId]:
+      """
+      Insert a broadcast job record.
+      
+      Returns:
+          The new broadcast _id, or None if the insert failed
+      """
+      try:
+        result = await db.broadcasts.insert_one(broadcast_data)
+        return result.inserted_id
+      except Exception as e:
+        print(f"Error creating broadcast: {e}")
+        return None
+    
+    @staticmethod
+    async def update_broadcast(broadcast_id: ObjectId, fields: dict) -> bool:
+      """Set fields on a broadcast record (checkpoints, status, counters)."""
+      try:
+        await db.broadcasts.update_one(
+          {"_id": broadcast_id},
+          {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}}
+        )
+        return True
+      except Exception as e:
+        print(f"Error updating broadcast: {e}")
+        return False
+    
+    @staticmethod
+    async def set_broadcast_status(
+      broadcast_id: ObjectId,
+      status: str,
+      from_statuses: Optional[List[str]] = None
+    ) -> bool:
+      """
+      Change a broadcast's status, optionally only from the given statuses.
+      
+      Returns:
+          True if the record was changed
+      """
+      query = {"_id": broadcast_id}
+      if from_statuses:
+        query["status"] = {"$in": from_statuses}
+      try:
+        result = await db.broadcasts.update_one(
+          query,
+          {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}}
+        )
+        return result.modified_count == 1
+      except Exception as e:
+        print(f"Error setting broadcast status: {e}")
+        return False
+    
+    @staticmethod
+    async def requeue_broadcasts(from_status: str, to_status: str) -> int:
+      """Move every broadcast in one status to another (e.g. running -> queued on startup)."""
+      try:
+        result = await db.broadcasts.update_many(
+          {"status": from_status},
+          {"$set": {"status": to_status, "updated_at": datetime.now(timezone.utc)}}
+        )
+        return result.modified_count
+      except Exception as e:
+        print(f"Error requeueing broadcasts: {e}")
+        return 0
+    
+    @staticmethod
+    async def claim_next_broadcast() -> Optional[dict]:
+      """
+      Atomically move the next due queued broadcast to running.
+      
+      Highest priority first, then earliest scheduled_at.
+      """
+      try:
+        return await db.broadcasts.find_one_and_update(
+          {"status": "queued", "scheduled_at": {"$lte": datetime.now(timezone.utc)}},
+          {"$set": {"status": "running", "updated_at": datetime.now(timezone.utc)}},
+          sort=[("priority", -1), ("scheduled_at", ASCENDING)],
+          return_document=ReturnDocument.AFTER
+        )
+      except Exception as e:
+        print(f"Error claiming next broadcast: {e}")
+        return None
+    
+    @staticmethod
+    async def get_next_scheduled_time() -> Optional[datetime]:
+      """Get the earliest scheduled_at among queued broadcasts."""
+      try:
+        record = await db.broadcasts.find_one(
+          {"status": "queued"},
+          {"scheduled_at": 1},
+          sort=[("scheduled_at", ASCENDING)]
+        )
+        return record.get("scheduled_at") if record else None
+      except Exception as e:
+        print(f"Error getting next scheduled broadcast: {e}")
+        return None
+    
+    @staticmethod
+    async def get_broadcasts_by_status(statuses: List[str]) -> List[dict]:
+      """Get broadcast records in any of the given statuses, oldest first."""
       try:
-        query = {"is_blocked": False} if exclude_blocked else {}
-        users = db.users.find(query, {"user_id": 1, "_id": 0})
-        return [user["user_id"] for user in users]
+        cursor = db.broadcasts.find({"status": {"$in": statuses}}).sort("sent_at", ASCENDING)
+        return await cursor.to_list(length=None)
       except Exception as e:
-        print(f"Error getting user IDs: {e}")
+        print(f"Error getting broadcasts: {e}")
         return []
-  
+    
+    @staticmethod
+    async def sample_user_id_boundaries(partitions: int, audience: Optional[dict] = None) -> List[int]:
+      """
+      Estimate user_id split points for `partitions` roughly equal ranges.
+      
+      $sample runs first so MongoDB can use its random cursor instead of
+      scanning; the sample is oversampled and the audience filter applied
+      afterwards. A filter too narrow to leave enough sampled users yields
+      no boundaries (a single partition).
+      
+      Returns:
+          Up to partitions - 1 ascending, distinct boundaries
+      """
+      if partitions <= 1:
+        return []
+      try:
+        cursor = db.users.aggregate([
+          {"$sample": {"size": partitions * 100 * BOUNDARY_OVERSAMPLE}},
+          {"$match": _audience_query(audience)},
+          {"$project": {"_id": 0, "user_id": 1}}
+        ])
+        sample = sorted({user["user_id"] async for user in cursor})
+        if len(sample) < partitions:
+          return []
+        step = len(sample) / partitions
+        return sorted({sample[int(step * i) - 1] for i in range(1, partitions)})
+      except Exception as e:
+        print(f"Error sampling user IDs: {e}")
+        return []
+    
+    @staticmethod
+    async def create_broadcast_partitions(partitions: List[dict]) -> bool:
+      """Insert the partition records for a broadcast."""
+      try:
+        await db.broadcast_partitions.insert_many(partitions, ordered=False)
+        return True
+      except Exception as e:
+        print(f"Error creating broadcast partitions: {e}")
+        return False
+    
+    @staticmethod
+    async def count_broadcast_partitions(broadcast_id: ObjectId, open_only: bool = False) -> int:
+      """Count a broadcast's partitions (only unfinished ones if open_only)."""
+      query = {"broadcast_id": broadcast_id}
+      if open_only:
+        query["status"] = {"$ne": "done"}
+      try:
+        return await db.broadcast_partitions.count_documents(query)
+      except Exception as e:
+        print(f"Error counting broadcast partitions: {e}")
+        return 0
+    
+    @staticmethod
+    async def claim_broadcast_partition(
+      owner: str,
+      lease_seconds: float,
+      broadcast_id: Optional[ObjectId] = None,
+      text_only: bool = False
+    ) -> Optional[dict]:
+      """
+      Atomically lease a pending partition, or one whose lease has expired.
+      
+      A partition whose parent broadcast is no longer running (paused or
+      cancelled) is put on hold instead of being returned.
+      
+      Args:
+          owner: Worker identifier
+          lease_seconds: Lease length; renewed by heartbeats
+          broadcast_id: Restrict to one broadcast (any if None)
+          text_only: Skip partitions of copied payloads (for a worker
+              on another bot token, which cannot read the source chat)
+          
+      Returns:
+          The claimed partition record, or None if nothing is claimable
+      """
+      now = datetime.now(timezone.utc)
+      query = {
+        "$or": [
+          {"status": "pending"},
+          {"status": "leased", "lease_expires_at": {"$lt": now}}
+        ]
+      }
+      if broadcast_id is not None:
+        query["broadcast_id"] = broadcast_id
+      if text_only:
+        query["is_copy"] = {"$ne": True}
+      try:
+        while True:
+          partition = await db.broadcast_partitions.find_one_and_update(
+            query,
+            {
+              "$set": {
+                "status": "leased",
+                "lease_owner": owner,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "heartbeat_at": now
+              }
+            },
+            sort=[("index", ASCENDING)],
+            return_document=ReturnDocument.AFTER
+          )
+          if partition is None or await MongoOperations._broadcast_is_running(partition["broadcast_id"]):
+            return partition
+          await db.broadcast_partitions.update_one(
+            {"_id": partition["_id"], "lease_owner": owner},
+            {"$set": {"status": "held"}}
+          )
+      except Exception as e:
+        print(f"Error claiming broadcast partition: {e}")
+        return None
+    
+    @staticmethod
+    async def heartbeat_broadcast_partition(
+      partition_id: ObjectId,
+      owner: str,
+      lease_seconds: float,
+      fields: dict
+    ) -> bool:
+      """
+      Renew a partition lease and checkpoint its cursor and counters.
+      
+      A partition put on hold (its broadcast was paused or cancelled)
+      still saves the checkpoint but is not renewed.
+      
+      Returns:
+          False if the lease now belongs to another worker, or the
+          partition is on hold or its broadcast is no longer running
+      """
+      now = datetime.now(timezone.utc)
+      try:
+        partition = await db.broadcast_partitions.find_one_and_update(
+          {"_id": partition_id, "status": {"$in": ["leased", "held"]}, "lease_owner": owner},
+          {
+            "$set": {
+              **fields,
+              "lease_expires_at": now + timedelta(seconds=lease_seconds),
+              "heartbeat_at": now
+            }
+          },
+          projection={"status": 1, "broadcast_id": 1}
+        )
+        if partition is None or partition["status"] != "leased":
+          return False
+        return await MongoOperations._broadcast_is_running(partition["broadcast_id"])
+      except Exception as e:
+        print(f"Error renewing broadcast partition lease: {e}")
+        return True
+    
+    @staticmethod
+    async def _broadcast_is_running(broadcast_id: ObjectId) -> bool:
+      """Whether a broadcast record is still in the running status."""
+      record = await db.broadcasts.find_one(
+        {"_id": broadcast_id, "status": "running"}, {"_id": 1}
+      )
+      return record is not None
+    
+    @staticmethod
+    async def hold_broadcast_partitions(broadcast_id: ObjectId) -> int:
+      """
+      Make a broadcast's unfinished partitions unclaimable (pause/cancel).
+      
+      Leased partitions keep their owner so its last checkpoint is saved;
+      the owner's next heartbeat fails and it stops sending.
+      """
+      try:
+        result = await db.broadcast_partitions.update_many(
+          {"broadcast_id": broadcast_id, "status": {"$in": ["pending", "leased"]}},
+          {"$set": {"status": "held"}}
+        )
+        return result.modified_count
+      except Exception as e:
+        print(f"Error holding broadcast partitions: {e}")
+        return 0
+    
+    @staticmethod
+    async def release_broadcast_partitions(broadcast_id: ObjectId) -> int:
+      """Make held partitions claimable again when their broadcast resumes."""
+      try:
+        result = await db.broadcast_partitions.update_many(
+          {"broadcast_id": broadcast_id, "status": "held"},
+          {"$set": {"status": "pending"}, "$unset": {"lease_owner": "", "lease_expires_at": ""}}
+        )
+        return result.modified_count
+      except Exception as e:
+        print(f"Error releasing broadcast partitions: {e}")
+        return 0
+    
+    @staticmethod
+    async def sync_broadcast_sender(
+      sender_id: str,
+      bot_id: str,
+      active: bool,
+      stale_after: float
+    ) -> Optional[int]:
+      """
+      Record this process as a sender on a bot token and count the others.
+      
+      Args:
+          sender_id: Process identifier
+          bot_id: Bot the process sends as (the token's numeric prefix)
+          active: Whether the process has been sending recently
+          stale_after: Seconds after which a sender that stopped
+              reporting is ignored
+          
+      Returns:
+          Other active senders on the same bot, or None on error
+      """
+      now = datetime.now(timezone.utc)
+      try:
+        await db.broadcast_senders.update_one(
+          {"_id": sender_id},
+          {"$set": {"bot_id": bot_id, "active": active, "seen_at": now}},
+          upsert=True
+        )
+        return await db.broadcast_senders.count_documents({
+          "_id": {"$ne": sender_id},
+          "bot_id": bot_id,
+          "active": True,
+          "seen_at": {"$gte": now - timedelta(seconds=stale_after)}
+        })
+      except Exception as e:
+        print(f"Error syncing broadcast sender: {e}")
+        return None
+    
+    @staticmethod
+    async def remove_broadcast_sender(sender_id: str):
+      """Forget a sender on shutdown so the others take back its share."""
+      try:
+        await db.broadcast_senders.delete_one({"_id": sender_id})
+      except Exception as e:
+        print(f"Error removing broadcast sender: {e}")
+    
     @staticmethod
-    def mark_user_blocked(user_id: int):
-      """Mark user as blocked (they blocked the bot)."""
+    async def sum_broadcast_partitions(broadcast_id: ObjectId) -> dict:
+      """
+      Sum the checkpointed counters of a broadcast's partitions.
+      
+      Returns:
+          Dictionary with successful, failed, blocked, flood_waits and
+          flood_wait_seconds
+      """
+      totals = {"successful": 0, "failed": 0, "blocked": 0, "flood_waits": 0, "flood_wait_seconds": 0.0}
+      try:
+        cursor = db.broadcast_partitions.aggregate([
+          {"$match": {"broadcast_id": broadcast_id}},
+          {"$group": {
+            "_id": None,
+            "successful": {"$sum": "$successful"},
+            "failed": {"$sum": "$failed"},
+            "blocked": {"$sum": "$blocked"},
+            "flood_waits": {"$sum": "$flood_waits"},
+            "flood_wait_seconds": {"$sum": "$flood_wait_seconds"}
+          }}
+        ])
+        async for row in cursor:
+          totals.update({key: row.get(key, 0) for key in totals})
+      except Exception as e:
+        print(f"Error summing broadcast partitions: {e}")
+      return totals
+    
+    @staticmethod
+    async def complete_broadcast_partition(partition_id: ObjectId, owner: str, fields: dict) -> bool:
+      """
+      Mark a leased partition done and add its counters to the parent broadcast.
+      
+      A partition put on hold while its last batch finished is completed too.
+      
+      Returns:
+          False if the lease was lost before completion
+      """
       try:
-        db.users.update_one(
-          {"user_id": user_id},
-          {"$set": {"is_blocked": True}}
+        partition = await db.broadcast_partitions.find_one_and_update(
+          {"_id": partition_id, "status": {"$in": ["leased", "held"]}, "lease_owner": owner},
+          {"$set": {**fields, "status": "done", "finished_at": datetime.now(timezone.utc)}},
+          return_document=ReturnDocument.AFTER
+        )
+        if partition is None:
+          return False
+        await db.broadcasts.update_one(
+          {"_id": partition["broadcast_id"]},
+          {
+            "$inc": {
+              "successful": partition.get("successful", 0),
+              "failed": partition.get("failed", 0),
+              "blocked": partition.get("blocked", 0)
+            }
+          }
         )
+        return True
       except Exception as e:
-        print(f"Error marking user as blocked: {e}")
+        print(f"Error completing broadcast partition: {e}")
+        return False
+    
+    @staticmethod
+    async def insert_broadcast_deliveries(rows: List[dict]) -> int:
+      """
+      Insert per-recipient delivery rows with one unordered insert_many.
+      
+      Raises on failure (BulkWriteError lists the rows that were not
+      written) so the caller can requeue them.
+      """
+      if not rows:
+        return 0
+      result = await db.broadcast_deliveries.insert_many(rows, ordered=False)
+      return len(result.inserted_ids)
     
     @staticmethod
-    def save_broadcast(broadcast_data: dict) -> bool:
-      """Save broadcast information to database."""
+    async def iter_broadcast_deliveries(
+      broadcast_id: ObjectId,
+      outcome: str = "sent",
+      batch_size: int = 1000,
+      after_user_id: Optional[int] = None
+    ) -> AsyncIterator[List[dict]]:
+      """
+      Stream a broadcast's delivery rows with one outcome, by ascending user_id.
+      
+      Yields:
+          Lists of {"user_id", "message_ids"} rows
+      """
+      query = {"broadcast_id": broadcast_id, "outcome": outcome}
+      if after_user_id is not None:
+        query["user_id"] = {"$gt": after_user_id}
+      
+      cursor = db.broadcast_deliveries.find(
+        query, {"user_id": 1, "message_ids": 1, "_id": 0}
+      ).sort("user_id", ASCENDING).batch_size(batch_size)
+      
+      batch = []
+      async for row in cursor:
+        batch.append(row)
+        if len(batch) >= batch_size:
+          yield batch
+          batch = []
+      if batch:
+        yield batch
+    
+    @staticmethod
+    async def get_latest_sent_broadcast(candidates: int = 20) -> Optional[dict]:
+      """
+      Get the most recent broadcast that reached users and is not running.
+      
+      Completed, paused, cancelled and failed broadcasts qualify once they
+      have sent something (see broadcast_was_sent); queued and running
+      ones are skipped. Records without a kind are broadcasts.
+      
+      Args:
+          candidates: Most recent records to check
+      """
+      query = {"kind": {"$in": [None, "broadcast"]}, "status": {"$nin": ["queued", "running"]}}
       try:
-        db.broadcasts.insert_one(broadcast_data)
+        cursor = db.broadcasts.find(query).sort("sent_at", -1).limit(candidates)
+        async for record in cursor:
+          if await MongoOperations.broadcast_was_sent(record):
+            return record
+        return None
+      except Exception as e:
+        print(f"Error getting latest broadcast: {e}")
+        return None
+    
+    @staticmethod
+    async def broadcast_was_sent(record: dict) -> bool:
+      """
+      Whether a broadcast reached anyone: a successful counter, or a "sent"
+      delivery row (partitioned jobs only add their counters to the record
+      when a partition completes).
+      """
+      if record.get("successful", 0) > 0:
         return True
+      try:
+        row = await db.broadcast_deliveries.find_one(
+          {"broadcast_id": record["_id"], "outcome": "sent"}, {"_id": 1}
+        )
+        return row is not None
       except Exception as e:
-        print(f"Error saving broadcast: {e}")
+        print(f"Error checking broadcast deliveries: {e}")
         return False
     
     @staticmethod
-    def init_bot_stats(start_time: datetime):
+    async def get_broadcast(broadcast_id: ObjectId) -> Optional[dict]:
+      """Get a broadcast record by _id."""
+      try:
+        return await db.broadcasts.find_one({"_id": broadcast_id})
+      except Exception as e:
+        print(f"Error getting broadcast: {e}")
+        return None
+    
+    @staticmethod
+    async def init_bot_stats(start_time: datetime):
       """Initialize bot statistics."""
       try:
-        db.bot_stats.update_one(
+        await db.bot_stats.update_one(
           {},
           {
             "$setOnInsert": {
@@ -147,13 +1071,42 @@ class MongoOperations:
         print(f"Error initializing bot stats: {e}")
   
     @staticmethod
-    def get_bot_start_time() -> Optional[datetime]:
+    async def get_banner_file_id(file_hash: str) -> Optional[str]:
+      """Get the uploaded /start banner file_id if it matches the file hash."""
+      try:
+        stats = await db.bot_stats.find_one({}, {"banner": 1, "_id": 0}) or {}
+        banner = stats.get("banner") or {}
+        if banner.get("hash") == file_hash:
+          return banner.get("file_id")
+        return None
+      except Exception as e:
+        print(f"Error getting banner file_id: {e}")
+        return None
+    
+    @staticmethod
+    async def save_banner_file_id(file_hash: str, file_id: str):
+      """Store the uploaded /start banner file_id with its file hash."""
+      try:
+        await db.bot_stats.update_one(
+          {},
+          {"$set": {"banner": {"hash": file_hash, "file_id": file_id}}},
+          upsert=True
+        )
+      except Exception as e:
+        print(f"Error saving banner file_id: {e}")
+  
+    @staticmethod
+    async def get_bot_start_time() -> Optional[datetime]:
       """Get bot start time from database."""
       try:
-        stats = db.bot_stats.find_one({})
+        stats = await db.bot_stats.find_one({})
         if stats:
           return stats.get("bot_started_at")
         return None
       except Exception as e:
         print(f"Error getting bot start time: {e}")
         return None
+
+
+# Per-method call counts and latencies for /metrics
+instrument_operations(MongoOperations)
@@ -5,26 +5,147 @@ Send messages to all bot users.
 
 from pyrogram import Client
 from pyrogram.types import Message
-from pyrogram.errors import FloodWait, UserIsBlocked, InputUserDeactivated
-import asyncio
-import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
 
+from broadcaster.engine import BroadcastPayload
+from broadcaster.jobs import BroadcastJob
+from broadcaster.scheduler import broadcast_scheduler
 from database.mongo import MongoOperations
-from database.models import Broadcast
 from utils.auth import owner_only
 from config.config import Config
 
 
+# Media types whose caption can be replaced when copying
+CAPTIONABLE_MEDIA = ("photo", "video", "document", "animation", "audio", "voice")
+
+# Units accepted by --in=, --active= and --joined=
+DELAY_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+# Options accepted before the broadcast text: --key=value ones and bare flags
+BROADCAST_OPTIONS = ("at", "in", "priority", "lang", "active", "joined", "min-interactions")
+BROADCAST_FLAGS = ("preview",)
+
+
+def parse_broadcast_options(text: str) -> Tuple[dict, str]:
+    """
+    Split leading `--key=value` options and `--flag`s off the broadcast text.
+    
+    Parsing stops at the first token that is not a known option, so text
+    such as "--- Flash sale ---" is broadcast as is.
+    
+    Args:
+        text: Text after the /broadcast command
+        
+    Returns:
+        Tuple of (options dict, remaining text)
+    """
+    options = {}
+    rest = text.strip()
+    while rest.startswith("--"):
+        token, _, remainder = rest.partition(" ")
+        key, equals, value = token[2:].partition("=")
+        key = key.lower()
+        if equals and key in BROADCAST_OPTIONS:
+            options[key] = value
+        elif not equals and key in BROADCAST_FLAGS:
+            options[key] = ""
+        else:
+            break
+        rest = remainder.strip()
+    return options, rest
+
+
+def parse_duration(value: str) -> timedelta:
+    """
+    Parse a duration such as 30m, 2h or 7d.
+    
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    amount, unit = value[:-1], value[-1:].lower()
+    if unit not in DELAY_UNITS:
+        raise ValueError(f"unknown duration unit in {value!r}")
+    return timedelta(seconds=float(amount) * DELAY_UNITS[unit])
+
+
+def parse_schedule(options: dict) -> Optional[datetime]:
+    """
+    Get the scheduled start from --at=YYYY-MM-DDTHH:MM or --in=30m/2h/1d.
+    
+    --at is UTC unless it carries an offset (e.g. +05:30), which is
+    converted to UTC.
+    
+    Raises:
+        ValueError: If the value cannot be parsed
+    """
+    if options.get("at"):
+        scheduled_at = datetime.fromisoformat(options["at"])
+        if scheduled_at.tzinfo is None:
+            return scheduled_at.replace(tzinfo=timezone.utc)
+        return scheduled_at.astimezone(timezone.utc)
+    if options.get("in"):
+        return datetime.now(timezone.utc) + parse_duration(options["in"])
+    return None
+
+
+def parse_audience(options: dict) -> Optional[dict]:
+    """
+    Get the audience filters from --lang, --active, --joined and --min-interactions.
+    
+    Relative windows become fixed cutoffs now, so a scheduled or resumed
+    job targets the audience that was previewed.
+    
+    Returns:
+        Audience dict for MongoOperations.iter_user_ids, or None for everyone
+    
+    Raises:
+        ValueError: If a value cannot be parsed
+    """
+    now = datetime.now(timezone.utc)
+    audience = {}
+    if options.get("lang"):
+        audience["language_codes"] = [
+            code.strip().lower() for code in options["lang"].split(",") if code.strip()
+        ]
+    if options.get("active"):
+        audience["active_since"] = now - parse_duration(options["active"])
+    if options.get("joined"):
+        audience["joined_since"] = now - parse_duration(options["joined"])
+    if options.get("min-interactions"):
+        audience["min_interactions"] = int(options["min-interactions"])
+    return audience or None
+
+
+def describe_audience(options: dict) -> str:
+    """Human-readable summary of the audience options."""
+    parts = []
+    if options.get("lang"):
+        parts.append(f"language {options['lang']}")
+    if options.get("active"):
+        parts.append(f"active in the last {options['active']}")
+    if options.get("joined"):
+        parts.append(f"joined in the last {options['joined']}")
+    if options.get("min-interactions"):
+        parts.append(f"at least {options['min-interactions']} interactions")
+    return ", ".join(parts) if parts else "all users"
+
+
 @owner_only
 async def broadcast_command(client: Client, message: Message):
     """
     Handle /broadcast command.
     
-    Usage: /broadcast Your message here
+    Usage: /broadcast [--at=YYYY-MM-DDTHH:MM | --in=30m] [--priority=N]
+                      [--lang=hi,en] [--active=7d] [--joined=30d]
+                      [--min-interactions=N] [--preview] Your message here
     
     - Only accessible by bot owner
-    - Sends message to all users
+    - Sends message to all users, or to the audience matching the filters
+    - --preview replies with the estimated audience size without sending
     - Tracks success/failure
+    - Queued as a checkpointed job, run by the broadcast scheduler
+      (one at a time by default) and resumed after a restart
     - Logs to database and log group
     """
     # Get broadcast message and check for reply
@@ -44,11 +165,45 @@ async def broadcast_command(client: Client, message: Message):
         else:
             broadcast_message = "[Media broadcast]"
     
+    # Split scheduling and audience options off the command text
+    command_text = message.text.split(None, 1)[1] if len(message.command) >= 2 else ""
+    try:
+        options, command_text = parse_broadcast_options(command_text)
+        scheduled_at = parse_schedule(options)
+        priority = int(options.get("priority") or 0)
+        audience = parse_audience(options)
+    except ValueError as e:
+        await message.reply_text(f"❌ Invalid broadcast option: {e}", quote=True)
+        return
+    
     # Check if there's text after /broadcast command
-    if len(message.command) >= 2:
+    caption_override = None
+    if command_text:
         # Override with explicit command text if provided
-        broadcast_message = message.text.split(None, 1)[1]
+        broadcast_message = command_text
         is_reply_broadcast = False
+        
+        # Replied captionable media is still copied, with the text as caption
+        replied_msg = message.reply_to_message
+        if replied_msg and any(
+            getattr(replied_msg, kind, None) for kind in CAPTIONABLE_MEDIA
+        ):
+            is_reply_broadcast = True
+            caption_override = broadcast_message
+    
+    # Estimated audience; IDs are streamed from the covering index when sending.
+    # None means the estimate failed, not that the audience is empty
+    total_users = await MongoOperations.count_audience(audience)
+    estimate = f"{total_users}" if total_users is not None else "unknown (the estimate failed)"
+    
+    if "preview" in options:
+        await message.reply_text(
+            "🎯 **Audience Preview**\n\n"
+            f"Filter: {describe_audience(options)}\n"
+            f"Estimated recipients: **{estimate}**",
+            quote=True
+        )
+        return
     
     # If still no message, show usage
     if not broadcast_message:
@@ -56,171 +211,56 @@ async def broadcast_command(client: Client, message: Message):
             "📢 **Broadcast Command**\n\n"
             "**Usage Options:**\n"
             "1. `/broadcast Your message here` - Send direct message\n"
-            "2. Reply to a message and send `/broadcast` - Broadcast the replied message\n\n"
-            "**Supported media:** Photos, videos, documents with captions",
+            "2. Reply to a message and send `/broadcast` - Broadcast the replied message\n"
+            "3. Reply to media with `/broadcast New caption` - Broadcast it with a new caption\n\n"
+            "**Options** (before the text):\n"
+            "`--at=2025-01-31T18:00` (UTC) or `--in=30m` / `2h` / `1d` - Schedule\n"
+            "`--priority=5` - Run before lower-priority queued jobs\n"
+            "`--lang=hi,en` `--active=7d` `--joined=30d` `--min-interactions=5` - Audience filters\n"
+            "`--preview` - Show the estimated audience size without sending\n\n"
+            "**Supported:** Any message type, including albums, stickers, voice and polls "
+            "(copied server-side with formatting and buttons)",
             quote=True
         )
         return
     
-    # Get all user IDs (excluding blocked users)
-    user_ids = MongoOperations.get_all_user_ids(exclude_blocked=True)
-    total_users = len(user_ids)
-    
     if total_users == 0:
         await message.reply_text("❌ No users to broadcast to.", quote=True)
         return
     
     # Send progress message
+    when = f"at {scheduled_at.strftime('%Y-%m-%d %H:%M')} UTC" if scheduled_at else "as soon as possible"
+    if total_users is None:
+        queued = "📢 Broadcast queued ⏳ (⚠️ the audience estimate failed; recipients are counted as they are sent)"
+    else:
+        queued = f"📢 Broadcast to ~{total_users} users queued ⏳"
     progress_msg = await message.reply_text(
-        f"📢 Broadcasting to {total_users} users... ⏳\n\n"
-        "This may take a few moments.",
+        f"{queued}\n\n"
+        f"Audience: {describe_audience(options)}\n"
+        f"Starts {when} (priority {priority}). Use /jobs to manage the queue.",
         quote=True
     )
     
-    # Broadcast counters
-    successful = 0
-    failed = 0
-    blocked = 0
-    start_time = time.time()
-    
-    # Check if replying to media
-    is_media = False
-    media = None
-    media_type = None
-    
-    if message.reply_to_message:
-        replied_msg = message.reply_to_message
-        if replied_msg.photo:
-            is_media = True
-            media_type = "photo"
-            media = replied_msg.photo.file_id
-        elif replied_msg.video:
-            is_media = True
-            media_type = "video"
-            media = replied_msg.video.file_id
-        elif replied_msg.document:
-            is_media = True
-            media_type = "document"
-            media = replied_msg.document.file_id
-    
-    # Broadcast to all users
-    for user_id in user_ids:
-        try:
-            if is_media:
-                # Send media with caption
-                if media_type == "photo":
-                    await client.send_photo(
-                        chat_id=user_id,
-                        photo=media,
-                        caption=broadcast_message
-                    )
-                elif media_type == "video":
-                    await client.send_video(
-                        chat_id=user_id,
-                        video=media,
-                        caption=broadcast_message
-                    )
-                elif media_type == "document":
-                    await client.send_document(
-                        chat_id=user_id,
-                        document=media,
-                        caption=broadcast_message
-                    )
-            else:
-                # Send text message
-                await client.send_message(
-                    chat_id=user_id,
-                    text=broadcast_message
-                )
-            
-            successful += 1
-            
-            # Small delay to avoid rate limiting
-            await asyncio.sleep(0.05)
-            
-        except FloodWait as e:
-            print(f"FloodWait: Sleeping for {e.value} seconds")
-            await asyncio.sleep(e.value)
-            # Retry
-            try:
-                if is_media:
-                    if media_type == "photo":
-                        await client.send_photo(user_id, media, caption=broadcast_message)
-                    elif media_type == "video":
-                        await client.send_video(user_id, media, caption=broadcast_message)
-                    elif media_type == "document":
-                        await client.send_document(user_id, media, caption=broadcast_message)
-                else:
-                    await client.send_message(user_id, broadcast_message)
-                successful += 1
-            except:
-                failed += 1
-                
-        except (UserIsBlocked, InputUserDeactivated):
-            failed += 1
-            blocked += 1
-            # Mark user as blocked
-            MongoOperations.mark_user_blocked(user_id)
-            
-        except Exception as e:
-            failed += 1
-            print(f"Error broadcasting to {user_id}: {e}")
-    
-    # Update progress message with results
-    end_time = time.time()
-    duration = end_time - start_time
-    
-    success_rate = (successful/total_users*100) if total_users > 0 else 0
-    avg_time_per_user = (duration / total_users) if total_users > 0 else 0
-    
-    results_message = (
-        "📢 **Broadcast Complete!**\n\n"
-        "📊 **Results:**\n"
-        f"✅ Successful: **{successful}**\n"
-        f"❌ Failed: **{failed}** (🚫 Blocked: {blocked})\n"
-        f"📈 Total Recipients: **{total_users}**\n"
-        f"📊 Success Rate: **{success_rate:.1f}%**\n\n"
-        "⏱️ **Timing:**\n"
-        f"⏳ Total Duration: **{duration:.2f}s**\n"
-        f"⚡ Avg per User: **{avg_time_per_user*1000:.1f}ms**"
+    # Persist the broadcast as a queued, resumable job
+    payload = BroadcastPayload.from_message(
+        broadcast_message,
+        message.reply_to_message if is_reply_broadcast else None,
+        caption=caption_override
     )
-    
-    await progress_msg.edit_text(results_message)
-    
-    # Save broadcast to database
-    broadcast_data = Broadcast(
-        message=broadcast_message,
+    job = await BroadcastJob.create(
+        client,
+        payload,
         sent_by=message.from_user.id,
-        total_recipients=total_users,
-        successful=successful,
-        failed=failed
-    ).to_dict()
-    
-    MongoOperations.save_broadcast(broadcast_data)
-    
-    # Log to log group
-    if hasattr(client, '_logger'):
-        try:
-            # Create detailed log message with stats
-            log_stats = (
-                f"📊 **Broadcast Statistics:**\n"
-                f"✅ Sent: {successful}\n"
-                f"❌ Failed: {failed}\n"
-                f"🚫 Blocked: {blocked}\n"
-                f"📈 Total: {total_users}\n"
-                f"📊 Rate: {success_rate:.1f}%\n\n"
-                f"⏱️ **Performance:**\n"
-                f"⏳ Duration: {duration:.2f}s\n"
-                f"⚡ Speed: {avg_time_per_user*1000:.1f}ms/user"
-            )
-            
-            await client._logger.log_broadcast(
-                sent_by=Config.OWNER_USERNAME,
-                message=broadcast_message,
-                successful=successful,
-                failed=failed,
-                total=total_users,
-                stats=log_stats
-            )
-        except Exception as e:
-            print(f"Error logging broadcast: {e}")
+        total_recipients=total_users or 0,
+        progress_chat_id=progress_msg.chat.id,
+        progress_message_id=progress_msg.id,
+        partitions=Config.BROADCAST_PARTITIONS,
+        priority=priority,
+        scheduled_at=scheduled_at,
+        audience=audience
+    )
+    if job is None:
+        await progress_msg.edit_text("❌ Could not create the broadcast job. Please try again.")
+        return
+    
+    broadcast_scheduler.wake()
@@ -0,0 +1,97 @@
+"""
+#(©)HighTierBots /jobs command handler (Owner only).
+List and manage queued, running, paused and failed broadcast jobs.
+"""
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pyrogram import Client
+from pyrogram.types import Message
+
+from broadcaster.jobs import (
+    STATUS_QUEUED,
+    STATUS_RUNNING,
+    STATUS_PAUSED,
+    STATUS_FAILED,
+    pause_job,
+    resume_job,
+    cancel_job,
+)
+from broadcaster.scheduler import broadcast_scheduler
+from database.mongo import MongoOperations
+from utils.auth import owner_only
+
+
+JOB_ACTIONS = {
+    "pause": pause_job,
+    "resume": resume_job,
+    "cancel": cancel_job,
+}
+
+STATUS_ICONS = {
+    STATUS_RUNNING: "▶️",
+    STATUS_QUEUED: "🕒",
+    STATUS_PAUSED: "⏸",
+    STATUS_FAILED: "⚠️",
+}
+
+
+@owner_only
+async def jobs_command(client: Client, message: Message):
+    """
+    Handle /jobs command.
+    
+    Usage: /jobs [pause|resume|cancel <broadcast_id>]
+    
+    - Only accessible by bot owner
+    - Without arguments lists running, queued, paused and failed jobs
+    - Paused and failed jobs keep their cursor and continue where they stopped
+    """
+    if len(message.command) >= 3 and message.command[1].lower() in JOB_ACTIONS:
+        action = message.command[1].lower()
+        try:
+            broadcast_id = ObjectId(message.command[2])
+        except InvalidId:
+            await message.reply_text("❌ Invalid job ID.", quote=True)
+            return
+        
+        if not await JOB_ACTIONS[action](broadcast_id):
+            await message.reply_text(
+                f"❌ Could not {action} job `{broadcast_id}` - it is missing or already finished.",
+                quote=True
+            )
+            return
+        
+        if action == "resume":
+            broadcast_scheduler.wake()
+        await message.reply_text(f"✅ Job `{broadcast_id}`: {action} requested.", quote=True)
+        return
+    
+    jobs = await MongoOperations.get_broadcasts_by_status(
+        [STATUS_RUNNING, STATUS_QUEUED, STATUS_PAUSED, STATUS_FAILED]
+    )
+    if not jobs:
+        await message.reply_text("📭 No queued, running, paused or failed broadcast jobs.", quote=True)
+        return
+    
+    # Running first, then queued in the order the scheduler will pick them
+    jobs.sort(key=lambda job: (
+        job["status"] != STATUS_RUNNING,
+        -job.get("priority", 0),
+        job.get("scheduled_at") or job["sent_at"],
+    ))
+    
+    lines = ["📋 **Broadcast Jobs**\n"]
+    for job in jobs:
+        scheduled_at = job.get("scheduled_at") or job["sent_at"]
+        processed = job.get("successful", 0) + job.get("failed", 0)
+        lines.append(
+            f"{STATUS_ICONS.get(job['status'], '•')} `{job['_id']}` "
+            f"{job.get('kind', 'broadcast')} - {job['status']}\n"
+            f"    priority {job.get('priority', 0)}, "
+            f"starts {scheduled_at.strftime('%Y-%m-%d %H:%M')} UTC, "
+            f"{processed}/{job.get('total_recipients', 0)} processed"
+        )
+    lines.append("\n`/jobs pause|resume|cancel <id>`")
+    
+    await message.reply_text("\n".join(lines), quote=True)
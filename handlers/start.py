@@ -5,11 +5,11 @@ Bot command to handle /start bot.
 
 from pyrogram import Client
 from pyrogram.types import Message, InlineKeyboardButton, InlineKeyboardMarkup
-import os
 
 from database.mongo import MongoOperations
+from database.activity_buffer import activity_buffer
 from utils.auth import get_user_info
-from utils.helpers import check_banner_exists
+from utils.banner import banner_cache
 
 
 async def start_command(client: Client, message: Message):
@@ -28,14 +28,11 @@ async def start_command(client: Client, message: Message):
     
     user_info = get_user_info(message)
     
-    is_new_user = MongoOperations.is_user_new(user_info['user_id'])
-    
-    MongoOperations.add_or_update_user(user_info)
-    
-    total_users = MongoOperations.get_total_users()
+    is_new_user = await activity_buffer.record(user_info) is True
     
     if is_new_user and hasattr(client, '_logger'):
         try:
+            total_users = await MongoOperations.get_total_users()
             await client._logger.log_new_user(user_info, total_users)
         except Exception as e:
             print(f"Error logging new user: {e}")
@@ -53,16 +50,9 @@ async def start_command(client: Client, message: Message):
         [InlineKeyboardButton("💼 Get Your Starter Package", url="https://github.com/HighTierBots/starter-package")],
     ])
     
-    banner_exists, banner_path = check_banner_exists()
-    
     try:
-        if banner_exists and os.path.exists(banner_path):
-            await message.reply_photo(
-                photo=banner_path,
-                caption=text,
-                reply_markup=keyboard
-            )
-        else:
+        # Uploaded once, then sent by cached file_id
+        if not await banner_cache.reply(message, caption=text, reply_markup=keyboard):
             await message.reply_text(
                 text,
                 reply_markup=keyboard
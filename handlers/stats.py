@@ -5,13 +5,27 @@ Display bot statistics and analytics.
 
 from pyrogram import Client
 from pyrogram.types import Message
-from datetime import datetime, timezone
+import asyncio
 
+from config.config import Config
 from database.mongo import MongoOperations
+from utils.antiflood import flood_guard
 from utils.auth import owner_only
+from utils.cache import AsyncTTLCache
 from utils.helpers import format_uptime, format_number
 
 
+async def load_stats_snapshot() -> tuple:
+    """Compute the (UserStats, bot start time) snapshot shown by /stats."""
+    return await asyncio.gather(
+        MongoOperations.get_user_stats(),
+        MongoOperations.get_bot_start_time()
+    )
+
+
+stats_cache = AsyncTTLCache(load_stats_snapshot, ttl=Config.STATS_CACHE_TTL)
+
+
 @owner_only
 async def stats_command(client: Client, message: Message):
     """
@@ -23,20 +37,14 @@ async def stats_command(client: Client, message: Message):
     - New users (today, this week, this month)
     - Bot uptime
     - Bot start time
+    - Anti-flood traffic shed since start
     """
     # Send "calculating" message
     calculating_msg = await message.reply_text("📊 Calculating statistics... ⏳", quote=True)
     
     try:
-        # Get statistics from database
-        total_users = MongoOperations.get_total_users()
-        active_users_24h = MongoOperations.get_active_users(hours=24)
-        new_users_today = MongoOperations.get_new_users_since(days=0)
-        new_users_week = MongoOperations.get_new_users_since(days=7)
-        new_users_month = MongoOperations.get_new_users_since(days=30)
-        
-        # Get bot start time
-        bot_start_time = MongoOperations.get_bot_start_time()
+        # Get cached statistics (refreshed in the background when stale)
+        (user_stats, bot_start_time), age = await stats_cache.get()
         
         if bot_start_time:
             uptime = format_uptime(bot_start_time)
@@ -45,20 +53,25 @@ async def stats_command(client: Client, message: Message):
             uptime = "Unknown"
             start_time_str = "Unknown"
         
+        flood = flood_guard.stats()
+        
         # Format statistics message
         stats_message = (
             "📊 **Bot Statistics**\n\n"
             
-            f"👥 Total Users: **{format_number(total_users)}**\n"
-            f"✅ Active Users (24h): **{format_number(active_users_24h)}**\n"
-            f"📅 New Users Today: **{format_number(new_users_today)}**\n"
-            f"📈 New Users This Week: **{format_number(new_users_week)}**\n"
-            f"📆 New Users This Month: **{format_number(new_users_month)}**\n\n"
+            f"👥 Total Users: **{format_number(user_stats.total_users)}**\n"
+            f"✅ Active Users (24h): **{format_number(user_stats.active_users_24h)}**\n"
+            f"📅 New Users Today: **{format_number(user_stats.new_users_today)}**\n"
+            f"📈 New Users This Week: **{format_number(user_stats.new_users_week)}**\n"
+            f"📆 New Users This Month: **{format_number(user_stats.new_users_month)}**\n\n"
             
             f"⏰ Bot Uptime: **{uptime}**\n"
-            f"🚀 Bot Started: **{start_time_str}**\n\n"
+            f"🚀 Bot Started: **{start_time_str}**\n"
+            f"🛡 Anti-flood: **{format_number(flood['shed'])}** updates dropped "
+            f"({format_number(flood['throttled'])} throttles)\n\n"
             
-            f"Last Updated: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC"
+            f"Last Updated: {user_stats.computed_at.strftime('%Y-%m-%d %H:%M:%S')} UTC "
+            f"({int(age)}s ago)"
         )
         
         # Update message with statistics
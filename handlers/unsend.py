@@ -0,0 +1,89 @@
+"""
+#(©)HighTierBots /unsend command handler (Owner only).
+Delete a previous broadcast from every recipient's chat.
+"""
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pyrogram import Client
+from pyrogram.types import Message
+
+from broadcaster.jobs import BroadcastJob, KIND_UNSEND, STATUS_QUEUED, STATUS_RUNNING
+from broadcaster.scheduler import broadcast_scheduler
+from database.mongo import MongoOperations
+from utils.auth import owner_only
+
+
+# Unsend jobs jump ahead of regular queued broadcasts
+UNSEND_PRIORITY = 100
+
+
+@owner_only
+async def unsend_command(client: Client, message: Message):
+    """
+    Handle /unsend command.
+    
+    Usage: /unsend [broadcast_id]
+    
+    - Only accessible by bot owner
+    - Defaults to the most recent broadcast that reached users
+    - Completed, paused, cancelled and failed broadcasts can be retracted;
+      a running one must be paused or cancelled first
+    - Deletes the stored message IDs through the rate-limited engine
+    - Queued ahead of broadcasts as a checkpointed, resumable job
+    """
+    if len(message.command) >= 2:
+        try:
+            target = await MongoOperations.get_broadcast(ObjectId(message.command[1]))
+        except InvalidId:
+            target = None
+    else:
+        target = await MongoOperations.get_latest_sent_broadcast()
+    
+    if target and target.get("status") == STATUS_RUNNING:
+        # An unsend running alongside would only delete the rows written so far
+        await message.reply_text(
+            f"❌ Broadcast `{target['_id']}` is still running. "
+            f"Stop it first with `/jobs pause {target['_id']}` or `/jobs cancel {target['_id']}`.",
+            quote=True
+        )
+        return
+    
+    if (
+        not target
+        or target.get("kind") == KIND_UNSEND
+        or target.get("status") == STATUS_QUEUED
+        or not await MongoOperations.broadcast_was_sent(target)
+    ):
+        await message.reply_text(
+            "🗑 **Unsend Command**\n\n"
+            "**Usage:** `/unsend` - Retract the latest broadcast\n"
+            "`/unsend <broadcast_id>` - Retract a specific broadcast\n\n"
+            "❌ Broadcast not found.",
+            quote=True
+        )
+        return
+    
+    total = target.get("successful", 0)
+    progress_msg = await message.reply_text(
+        f"🗑 Deleting broadcast `{target['_id']}` from {total} chats... ⏳\n\n"
+        "Only messages sent in the last 48 hours can be deleted.",
+        quote=True
+    )
+    
+    job = await BroadcastJob.create(
+        client,
+        None,
+        sent_by=message.from_user.id,
+        total_recipients=total,
+        progress_chat_id=progress_msg.chat.id,
+        progress_message_id=progress_msg.id,
+        kind=KIND_UNSEND,
+        target_broadcast_id=target["_id"],
+        priority=UNSEND_PRIORITY
+    )
+    if job is None:
+        await progress_msg.edit_text("❌ Could not create the unsend job. Please try again.")
+        return
+    
+    broadcast_scheduler.wake()
@@ -0,0 +1,31 @@
+"""
+#(©)HighTierBots - One-off daily_stats backfill.
+Rebuilds the daily_stats rollup from the users collection. Safe to re-run:
+counts are merged with $max and never lower what the bot recorded live.
+
+Usage:
+    python script/backfill_daily_stats.py
+"""
+
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from config.database import db
+from database.mongo import MongoOperations
+
+
+async def main():
+  await db.initialize()
+  print("🔄 Backfilling daily_stats from users...")
+  written = await MongoOperations.backfill_daily_stats()
+  print(f"✅ daily_stats backfilled: {written:,} days")
+  db.close()
+
+
+if __name__ == "__main__":
+  asyncio.run(main())
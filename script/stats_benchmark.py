@@ -0,0 +1,145 @@
+"""
+#(©)HighTierBots - /stats query benchmark.
+Compares the legacy five sequential count_documents, a single $facet
+aggregation and MongoOperations.get_user_stats (concurrent index-only
+window counts) on synthetic users.
+
+Usage:
+    python script/stats_benchmark.py --users 1000000 10000000
+
+Uses the DB_URI from .env and a separate "<DB_NAME>_bench" database,
+which is dropped and re-seeded for every size unless --keep is passed.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+os.environ["DB_NAME"] = f"{os.environ.get('DB_NAME', 'highTierBots')}_bench"
+
+from config.database import db
+from database.mongo import MongoOperations
+from utils.helpers import get_time_periods
+
+
+BATCH_SIZE = 10000
+
+
+async def seed_users(count: int):
+  """Insert `count` synthetic users spread over the last 365 days."""
+  await db.users.drop()
+  await db.bot_stats.drop()
+  await db.create_indexes()
+  
+  now = datetime.now(timezone.utc)
+  for start in range(0, count, BATCH_SIZE):
+    batch = []
+    for user_id in range(start, min(start + BATCH_SIZE, count)):
+      joined_at = now - timedelta(seconds=random.randint(0, 365 * 86400))
+      last_active = joined_at + (now - joined_at) * random.random()
+      batch.append({
+        "user_id": user_id,
+        "first_name": f"user{user_id}",
+        "language_code": "en",
+        "is_bot": False,
+        "joined_at": joined_at,
+        "last_active": last_active,
+        "is_blocked": random.random() < 0.05,
+        "interaction_count": random.randint(1, 50)
+      })
+    await db.users.insert_many(batch, ordered=False)
+  
+  await MongoOperations.reconcile_user_counters()
+
+
+async def legacy_stats() -> tuple:
+  """The original sequential five-query /stats path."""
+  return (
+    await db.users.count_documents({}),
+    await MongoOperations.get_active_users(hours=24),
+    await MongoOperations.get_new_users_since(days=0),
+    await MongoOperations.get_new_users_since(days=7),
+    await MongoOperations.get_new_users_since(days=30)
+  )
+
+
+async def facet_stats() -> dict:
+  """Every window in one $facet pass over an $or $match (fetches documents)."""
+  periods = get_time_periods()
+  active_since = datetime.now(timezone.utc) - timedelta(hours=24)
+  
+  def window(field: str, since: datetime) -> list:
+    return [{"$match": {field: {"$gte": since}}}, {"$count": "count"}]
+  
+  cursor = db.users.aggregate([
+    {
+      "$match": {
+        "$or": [
+          {"joined_at": {"$gte": periods["month_start"]}},
+          {"last_active": {"$gte": active_since}}
+        ]
+      }
+    },
+    {"$project": {"_id": 0, "joined_at": 1, "last_active": 1}},
+    {
+      "$facet": {
+        "active_24h": window("last_active", active_since),
+        "new_today": window("joined_at", periods["today_start"]),
+        "new_week": window("joined_at", periods["week_start"]),
+        "new_month": window("joined_at", periods["month_start"])
+      }
+    }
+  ])
+  return (await cursor.to_list(length=1) or [{}])[0]
+
+
+async def timed(coro_factory, runs: int) -> float:
+  """Return the median wall time of `runs` calls in milliseconds."""
+  samples = []
+  for _ in range(runs):
+    started = time.perf_counter()
+    await coro_factory()
+    samples.append((time.perf_counter() - started) * 1000)
+  samples.sort()
+  return samples[len(samples) // 2]
+
+
+async def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+  parser.add_argument("--users", type=int, nargs="+", default=[1000000, 10000000])
+  parser.add_argument("--runs", type=int, default=5)
+  parser.add_argument("--keep", action="store_true", help="reuse existing data")
+  args = parser.parse_args()
+  
+  await db.initialize()
+  
+  for count in args.users:
+    if not args.keep:
+      print(f"🔄 Seeding {count:,} users...")
+      await seed_users(count)
+    
+    legacy_ms = await timed(legacy_stats, args.runs)
+    facet_ms = await timed(facet_stats, args.runs)
+    stats_ms = await timed(MongoOperations.get_user_stats, args.runs)
+    
+    print(f"📊 {count:,} users (median of {args.runs} runs)")
+    print(f"   • five count_documents: {legacy_ms:,.1f}ms")
+    print(f"   • single $facet:        {facet_ms:,.1f}ms")
+    print(f"   • get_user_stats:       {stats_ms:,.1f}ms ({legacy_ms / stats_ms:.2f}x legacy)")
+  
+  db.close()
+
+
+if __name__ == "__main__":
+  asyncio.run(main())
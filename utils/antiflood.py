@@ -0,0 +1,119 @@
+"""
+#(©)HighTierBots
+Per-user anti-flood guard. Runs in a handler group before the command
+handlers and stops propagation for users over the limit, so flooded
+updates never reach MongoDB or send a reply.
+"""
+
+import time
+from collections import OrderedDict
+from typing import List
+
+from pyrogram import Client
+from pyrogram.types import Message
+
+from config.config import Config
+from utils.auth import is_owner
+from utils.metrics import register_callback
+
+
+class FloodGuard:
+    """
+    Sliding-window message counters per user.
+    
+    Each user costs one small list [window index, previous window count,
+    current window count, cooldown end] in an LRU map capped at
+    max_users entries. The sliding count is the current window plus the
+    previous one weighted by how much of it still overlaps.
+    """
+    
+    def __init__(self, limit: int, window: float, cooldown: float, max_users: int):
+        """
+        Args:
+            limit: Messages allowed per user per sliding window
+            window: Window length in seconds
+            cooldown: Seconds a user is ignored after exceeding the limit
+            max_users: Users tracked before the least recently seen is evicted
+        """
+        self.limit = limit
+        self.window = window
+        self.cooldown = cooldown
+        self.max_users = max_users
+        self._users: "OrderedDict[int, List[float]]" = OrderedDict()
+        
+        # Counters
+        self.allowed = 0
+        self.shed = 0
+        self.throttled = 0
+        self.evicted = 0
+    
+    def stats(self) -> dict:
+        """Traffic and memory counters."""
+        return {
+            "allowed": self.allowed,
+            "shed": self.shed,
+            "throttled": self.throttled,
+            "evicted": self.evicted,
+            "tracked_users": len(self._users)
+        }
+    
+    def allow(self, user_id: int) -> bool:
+        """Count one message from a user; False if it should be dropped."""
+        now = time.monotonic()
+        index = int(now // self.window)
+        entry = self._users.get(user_id)
+        if entry is None:
+            entry = [index, 0, 0, 0.0]
+            self._users[user_id] = entry
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._users.move_to_end(user_id)
+        
+        if now < entry[3]:
+            self.shed += 1
+            return False
+        
+        # Roll the window forward
+        if index != entry[0]:
+            entry[1] = entry[2] if index == entry[0] + 1 else 0
+            entry[2] = 0
+            entry[0] = index
+        
+        overlap = 1 - (now % self.window) / self.window
+        if entry[1] * overlap + entry[2] >= self.limit:
+            entry[3] = now + self.cooldown
+            self.throttled += 1
+            self.shed += 1
+            return False
+        
+        entry[2] += 1
+        self.allowed += 1
+        return True
+
+
+flood_guard = FloodGuard(
+    limit=Config.FLOOD_LIMIT,
+    window=Config.FLOOD_WINDOW,
+    cooldown=Config.FLOOD_COOLDOWN,
+    max_users=Config.FLOOD_TRACKED_USERS
+)
+
+register_callback(
+    "antiflood_shed_total", "Updates dropped by the anti-flood guard.",
+    lambda: flood_guard.shed, kind="counter"
+)
+
+
+async def flood_filter(client: Client, message: Message):
+    """
+    Handler for a group that runs before the command handlers.
+    
+    Stops propagation for flooding users; the owner is never limited.
+    """
+    user = message.from_user
+    if not user or is_owner(user.id):
+        return
+    if not flood_guard.allow(user.id):
+        message.stop_propagation()
@@ -0,0 +1,113 @@
+"""
+#(©)HighTierBots
+/start banner cache. The banner is uploaded once and its Telegram file_id
+is reused for every later /start. The file_id is kept in memory and in
+bot_stats, keyed by the file's SHA-256, so it survives restarts and is
+dropped automatically when the asset changes.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Optional, Tuple
+
+from pyrogram.errors import FloodWait
+from pyrogram.types import Message
+
+from database.mongo import MongoOperations
+from utils.helpers import check_banner_exists
+
+
+# Seconds between checks of assets/ for a new or changed banner
+BANNER_CHECK_INTERVAL = 60
+
+
+def _file_sha256(path: str) -> str:
+    """SHA-256 of a file (run in a thread)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BannerCache:
+    """Tracks the banner file and its uploaded file_id."""
+    
+    def __init__(self, check_interval: float = BANNER_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.path: Optional[str] = None
+        self.file_hash: Optional[str] = None
+        self.file_id: Optional[str] = None
+        self._signature: Optional[Tuple[str, int, int]] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    async def _refresh(self):
+        """Re-locate the banner; rehash it only if its path, size or mtime changed."""
+        self._checked_at = time.monotonic()
+        exists, path = check_banner_exists()
+        if not exists:
+            self.path = self.file_hash = self.file_id = self._signature = None
+            return
+        
+        stat = os.stat(path)
+        signature = (path, stat.st_size, stat.st_mtime_ns)
+        if signature == self._signature:
+            return
+        
+        self.path = path
+        self._signature = signature
+        self.file_hash = await asyncio.to_thread(_file_sha256, path)
+        self.file_id = await MongoOperations.get_banner_file_id(self.file_hash)
+    
+    async def _ensure_fresh(self):
+        """Refresh at most once per check_interval."""
+        if self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval:
+            await self._refresh()
+    
+    async def _upload(self, message: Message, **kwargs) -> Message:
+        """Upload the banner from disk and remember its file_id."""
+        sent = await message.reply_photo(photo=self.path, **kwargs)
+        if sent and sent.photo:
+            self.file_id = sent.photo.file_id
+            await MongoOperations.save_banner_file_id(self.file_hash, self.file_id)
+        return sent
+    
+    async def reply(self, message: Message, **kwargs) -> bool:
+        """
+        Reply with the banner photo.
+        
+        Args:
+            message: Message to reply to
+            **kwargs: Passed to reply_photo (caption, reply_markup, ...)
+        
+        Returns:
+            False if there is no banner in assets/
+        """
+        await self._ensure_fresh()
+        if self.path is None:
+            return False
+        
+        if self.file_id is None:
+            # Single-flight: concurrent first /starts wait for one upload
+            async with self._lock:
+                if self.file_id is None:
+                    await self._upload(message, **kwargs)
+                    return True
+        
+        try:
+            await message.reply_photo(photo=self.file_id, **kwargs)
+        except FloodWait:
+            raise
+        except Exception as e:
+            # Stale file_id (e.g. a different bot token): upload again
+            print(f"Cached banner file_id rejected, re-uploading: {e}")
+            self.file_id = None
+            async with self._lock:
+                await self._upload(message, **kwargs)
+        return True
+
+
+banner_cache = BannerCache()
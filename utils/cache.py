@@ -0,0 +1,67 @@
+"""
+#(©)HighTierBots
+Async caching utilities, add more as needed.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+
+class AsyncTTLCache:
+    """
+    Single-value cache with stale-while-revalidate and single-flight refresh.
+    
+    Fresh values are returned as is. Stale values are returned immediately
+    while one background task refreshes them. Concurrent callers always
+    share the same in-flight computation. A loader that raises leaves the
+    previous value in place.
+    """
+    
+    def __init__(self, loader: Callable[[], Awaitable[Any]], ttl: float):
+        """
+        Args:
+            loader: Coroutine function that computes the value
+            ttl: Seconds a value stays fresh
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self._value: Any = None
+        self._loaded_at: Optional[float] = None
+        self._inflight: Optional[asyncio.Task] = None
+    
+    async def _load(self) -> Any:
+        """Run the loader and store its result."""
+        value = await self.loader()
+        self._value = value
+        self._loaded_at = time.monotonic()
+        return value
+    
+    def _refresh(self) -> asyncio.Task:
+        """Start a refresh unless one is already running."""
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._load())
+            self._inflight.add_done_callback(self._on_refreshed)
+        return self._inflight
+    
+    @staticmethod
+    def _on_refreshed(task: asyncio.Task):
+        """Report background refresh failures instead of dropping them."""
+        if not task.cancelled() and task.exception():
+            print(f"Error refreshing cache: {task.exception()}")
+    
+    async def get(self) -> Tuple[Any, float]:
+        """
+        Get the cached value.
+        
+        Returns:
+            Tuple of (value, age in seconds)
+        """
+        if self._loaded_at is None:
+            value = await asyncio.shield(self._refresh())
+            return value, 0.0
+        
+        age = time.monotonic() - self._loaded_at
+        if age >= self.ttl:
+            self._refresh()
+        return self._value, age
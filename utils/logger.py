@@ -1,21 +1,89 @@
 """
 Log group notification utilities.
+
+Every Logger method only formats its message and puts it on a bounded
+queue; one background task sends them, so a FloodWait on the log group
+never delays the handler that logged. When the queue is full new events
+are dropped (and counted). Bursts of new users are folded into periodic
+digest messages.
 """
 
 from datetime import datetime, timezone
+from typing import List, Optional
 from pyrogram import Client
 from pyrogram.errors import FloodWait, PeerIdInvalid
 import asyncio
+import time
 from config.config import Config
 
 
+# Names listed in a new-user digest before "...and N more"
+DIGEST_SAMPLE_SIZE = 10
+
+
 class Logger:
     """Log group notification handler."""
     
-    def __init__(self, client: Client):
+    def __init__(
+        self,
+        client: Client,
+        queue_size: int = Config.LOG_QUEUE_SIZE,
+        digest_threshold: int = Config.LOG_DIGEST_THRESHOLD,
+        digest_window: float = Config.LOG_DIGEST_WINDOW
+    ):
         self.client = client
         self.log_group_id = Config.LOG_GROUP_ID
         self._disabled = False
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+        
+        # New-user digest window
+        self.digest_threshold = digest_threshold
+        self.digest_window = digest_window
+        self._window_started = 0.0
+        self._window_count = 0
+        self._digest_users: List[dict] = []
+        self._digest_count = 0
+        self._digest_total = 0
+        
+        # Counters
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.digested = 0
+        self.flood_waits = 0
+    
+    def stats(self) -> dict:
+        """Queue and delivery counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "digested": self.digested,
+            "flood_waits": self.flood_waits
+        }
+    
+    def _enqueue(self, event: tuple) -> bool:
+        """
+        Queue an event without waiting.
+        
+        Returns:
+            False if logging is disabled or the event was dropped (queue full)
+        """
+        if self._disabled:
+            return False
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                print(f"⚠️ Log queue full, dropped {self.dropped} log messages so far")
+            return False
+        self.enqueued += 1
+        return True
     
     async def log_new_user(self, user_info: dict, total_users: int):
         """
@@ -25,37 +93,7 @@ class Logger:
             user_info: Dictionary containing user information
             total_users: Total number of users in the database
         """
-        if self._disabled:
-            return
-        try:
-            username = f"@{user_info['username']}" if user_info.get('username') else "N/A"
-            full_name = user_info.get('first_name', 'Unknown')
-            if user_info.get('last_name'):
-                full_name += f" {user_info['last_name']}"
-            
-            message = (
-                "🆕 **New User Started Bot**\n\n"
-                "👤 **User Info:**\n"
-                f"• Name: {full_name}\n"
-                f"• Username: {username}\n"
-                f"• User ID: `{user_info['user_id']}`\n"
-                f"• Language: {user_info.get('language_code', 'N/A')}\n\n"
-                f"📅 Date: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC\n\n"
-                f"📊 Total Users: **{total_users:,}**"
-            )
-            
-            await self.client.send_message(
-                chat_id=self.log_group_id,
-                text=message
-            )
-        except PeerIdInvalid:
-            self._disabled = True
-            print("Log group disabled: invalid LOG_GROUP_ID or bot not in group.")
-        except FloodWait as e:
-            print(f"FloodWait: Sleeping for {e.value} seconds")
-            await asyncio.sleep(e.value)
-        except Exception as e:
-            print(f"Error logging new user to group: {e}")
+        self._enqueue(("new_user", user_info, total_users))
     
     async def log_broadcast(self, sent_by: str, message: str, successful: int, failed: int, total: int, stats: str = ""):
         """
@@ -69,36 +107,25 @@ class Logger:
             total: Total recipients
             stats: Additional statistics string (optional)
         """
-        if self._disabled:
-            return
-        try:
-            # Truncate message if too long
-            display_message = message[:100] + "..." if len(message) > 100 else message
-            
-            log_message = (
-                "📢 **Broadcast Message Sent**\n\n"
-                f"👨‍💻 Sent by: @{sent_by}\n"
-                f"📝 Message: \"{display_message}\"\n\n"
-                "📊 **Results:**\n"
-                f"✅ Successful: {successful}\n"
-                f"❌ Failed: {failed}\n"
-                f"📈 Total Recipients: {total}\n"
-            )
-            
-            if stats:
-                log_message += f"\n{stats}\n"
-            
-            log_message += f"\n⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC"
-            
-            await self.client.send_message(
-                chat_id=self.log_group_id,
-                text=log_message
-            )
-        except PeerIdInvalid:
-            self._disabled = True
-            print("Log group disabled: invalid LOG_GROUP_ID or bot not in group.")
-        except Exception as e:
-            print(f"Error logging broadcast to group: {e}")
+        # Truncate message if too long
+        display_message = message[:100] + "..." if len(message) > 100 else message
+        
+        log_message = (
+            "📢 **Broadcast Message Sent**\n\n"
+            f"👨‍💻 Sent by: @{sent_by}\n"
+            f"📝 Message: \"{display_message}\"\n\n"
+            "📊 **Results:**\n"
+            f"✅ Successful: {successful}\n"
+            f"❌ Failed: {failed}\n"
+            f"📈 Total Recipients: {total}\n"
+        )
+        
+        if stats:
+            log_message += f"\n{stats}\n"
+        
+        log_message += f"\n⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC"
+        
+        self._enqueue(("text", log_message, "broadcast"))
     
     async def log_bot_started(self, total_users: int):
         """
@@ -107,25 +134,13 @@ class Logger:
         Args:
             total_users: Total number of users in database
         """
-        if self._disabled:
-            return
-        try:
-            message = (
-                "🚀 **Bot Started Successfully**\n\n"
-                f"⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC\n"
-                f"📊 Total Users in DB: **{total_users:,}**\n"
-                "✅ Status: **Online**"
-            )
-            
-            await self.client.send_message(
-                chat_id=self.log_group_id,
-                text=message
-            )
-        except PeerIdInvalid:
-            self._disabled = True
-            print("Log group disabled: invalid LOG_GROUP_ID or bot not in group.")
-        except Exception as e:
-            print(f"Error logging bot start to group: {e}")
+        message = (
+            "🚀 **Bot Started Successfully**\n\n"
+            f"⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC\n"
+            f"📊 Total Users in DB: **{total_users:,}**\n"
+            "✅ Status: **Online**"
+        )
+        self._enqueue(("text", message, "bot start"))
     
     async def log_error(self, error: str, module: str):
         """
@@ -135,22 +150,161 @@ class Logger:
             error: Error message
             module: Module where error occurred
         """
-        if self._disabled:
+        message = (
+            "⚠️ **Error Occurred**\n\n"
+            f"📝 Error: {error}\n"
+            f"📂 Module: {module}\n"
+            f"⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC"
+        )
+        self._enqueue(("text", message, "error"))
+    
+    async def log_loop_stall(self, lag: float, location: str, stack: str):
+        """
+        Log an event loop stall to the log group.
+        
+        Args:
+            lag: Seconds the event loop was blocked
+            location: Offending frame (file:line function)
+            stack: Formatted stack captured during the stall
+        """
+        message = (
+            "🐢 **Event Loop Blocked**\n\n"
+            f"⏳ Blocked for: **{lag:.2f}s**\n"
+            f"📂 At: `{location}`\n\n"
+            f"```\n{stack[-3000:]}\n```\n"
+            f"⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC"
+        )
+        self._enqueue(("text", message, "loop stall"))
+    
+    @staticmethod
+    def _format_new_user(user_info: dict, total_users: int) -> str:
+        """Message for a single new user."""
+        username = f"@{user_info['username']}" if user_info.get('username') else "N/A"
+        full_name = user_info.get('first_name', 'Unknown')
+        if user_info.get('last_name'):
+            full_name += f" {user_info['last_name']}"
+        
+        return (
+            "🆕 **New User Started Bot**\n\n"
+            "👤 **User Info:**\n"
+            f"• Name: {full_name}\n"
+            f"• Username: {username}\n"
+            f"• User ID: `{user_info['user_id']}`\n"
+            f"• Language: {user_info.get('language_code', 'N/A')}\n\n"
+            f"📅 Date: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC\n\n"
+            f"📊 Total Users: **{total_users:,}**"
+        )
+    
+    async def _send(self, text: str, what: str):
+        """Send one message to the log group, waiting out a FloodWait once."""
+        for attempt in range(2):
+            try:
+                await self.client.send_message(
+                    chat_id=self.log_group_id,
+                    text=text
+                )
+                self.sent += 1
+                return
+            except PeerIdInvalid:
+                self._disabled = True
+                print("Log group disabled: invalid LOG_GROUP_ID or bot not in group.")
+                return
+            except FloodWait as e:
+                # Only the log task sleeps; callers keep enqueueing
+                self.flood_waits += 1
+                print(f"FloodWait on log group: sleeping for {e.value} seconds")
+                await asyncio.sleep(e.value)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error logging {what} to group: {e}")
+                return
+        self.failed += 1
+    
+    async def _on_new_user(self, user_info: dict, total_users: int):
+        """Log a new user on its own, or add it to the digest during a burst."""
+        if time.monotonic() - self._window_started >= self.digest_window:
+            if self._digest_count:
+                await self._send_digest()
+            else:
+                self._window_started = time.monotonic()
+                self._window_count = 0
+        self._window_count += 1
+        
+        if self._window_count <= self.digest_threshold:
+            await self._send(self._format_new_user(user_info, total_users), "new user")
             return
-        try:
-            message = (
-                "⚠️ **Error Occurred**\n\n"
-                f"📝 Error: {error}\n"
-                f"📂 Module: {module}\n"
-                f"⏰ Time: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC"
-            )
+        
+        if len(self._digest_users) < DIGEST_SAMPLE_SIZE:
+            self._digest_users.append(user_info)
+        self._digest_count += 1
+        self._digest_total = total_users
+    
+    async def _send_digest(self):
+        """Send the pending new users as one digest message."""
+        count = self._digest_count
+        if not count:
+            return
+        
+        lines = []
+        for user_info in self._digest_users:
+            username = f" (@{user_info['username']})" if user_info.get('username') else ""
+            lines.append(f"• {user_info.get('first_name', 'Unknown')}{username} `{user_info['user_id']}`")
+        if count > len(self._digest_users):
+            lines.append(f"…and {count - len(self._digest_users)} more")
+        
+        message = (
+            f"🆕 **{count} new users in the last {self.digest_window:.0f}s**\n\n"
+            + "\n".join(lines) + "\n\n"
+            f"📊 Total Users: **{self._digest_total:,}**"
+        )
+        
+        self._digest_users = []
+        self._digest_count = 0
+        self.digested += count
+        # Stay in digest mode while the burst lasts
+        self._window_started = time.monotonic()
+        self._window_count = self.digest_threshold
+        
+        await self._send(message, "new user digest")
+    
+    async def _drain(self):
+        """Background task: send queued events in order."""
+        while True:
+            timeout = None
+            if self._digest_count:
+                timeout = max(self._window_started + self.digest_window - time.monotonic(), 0)
+            try:
+                event = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                await self._send_digest()
+                continue
             
-            await self.client.send_message(
-                chat_id=self.log_group_id,
-                text=message
-            )
-        except PeerIdInvalid:
-            self._disabled = True
-            print("Log group disabled: invalid LOG_GROUP_ID or bot not in group.")
-        except Exception as e:
-            print(f"Error logging error to group: {e}")
+            try:
+                if self._disabled:
+                    continue
+                if event[0] == "new_user":
+                    await self._on_new_user(event[1], event[2])
+                else:
+                    await self._send(event[1], event[2])
+            except Exception as e:
+                print(f"Error in log queue: {e}")
+            finally:
+                self._queue.task_done()
+    
+    def start(self):
+        """Start the background sender."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+    
+    async def stop(self, timeout: float = 5.0):
+        """Send what is queued (up to `timeout` seconds), then stop."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+            await asyncio.wait_for(self._send_digest(), timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Dropping {self._queue.qsize()} unsent log messages")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
@@ -0,0 +1,246 @@
+"""
+#(©)HighTierBots
+Prometheus-compatible metrics. Recording only bumps numbers in dicts and
+lists; the text exposition format is built when /metrics is scraped.
+"""
+
+import asyncio
+import inspect
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+PREFIX = "hightierbots_"
+
+# Latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["Metric"] = []
+
+
+class Metric:
+    """Base class: a named metric with at most one label."""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, help: str, label: Optional[str] = None):
+        self.name = PREFIX + name
+        self.help = help
+        self.label = label
+        _registry.append(self)
+    
+    def _labels(self, value, extra: str = "") -> str:
+        """Render the label set for a series."""
+        parts = []
+        if self.label is not None and value is not None:
+            parts.append(f'{self.label}="{value}"')
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+    
+    def samples(self) -> List[str]:
+        """Sample lines for the exposition format."""
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonic counter, optionally split by one label."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help: str, label: Optional[str] = None):
+        super().__init__(name, help, label)
+        self.values: Dict[Optional[str], float] = {}
+    
+    def inc(self, label_value: Optional[str] = None, amount: float = 1):
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+    
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._labels(value)} {count}"
+            for value, count in self.values.items()
+        ]
+
+
+class Histogram(Metric):
+    """Bucketed latency histogram, optionally split by one label."""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: Optional[str] = None,
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, label)
+        self.buckets = buckets
+        # label value -> [per-bucket counts (last one is +Inf), sum]
+        self.series: Dict[Optional[str], list] = {}
+    
+    def observe(self, value: float, label_value: Optional[str] = None):
+        series = self.series.get(label_value)
+        if series is None:
+            series = self.series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for value, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = self._labels(value, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = self._labels(value, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(value)} {total}")
+            lines.append(f"{self.name}_count{self._labels(value)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """Gauge or counter whose value is read from `func` at scrape time."""
+    
+    def __init__(self, name: str, help: str, func: Callable[[], float], kind: str = "gauge"):
+        super().__init__(name, help)
+        self.kind = kind
+        self.func = func
+    
+    def samples(self) -> List[str]:
+        try:
+            return [f"{self.name} {self.func()}"]
+        except Exception as e:
+            print(f"Error reading metric {self.name}: {e}")
+            return []
+
+
+def register_callback(name: str, help: str, func: Callable[[], float], kind: str = "gauge"):
+    """Expose a value owned by another component (read on every scrape)."""
+    for metric in _registry:
+        if metric.name == PREFIX + name:
+            _registry.remove(metric)
+            break
+    CallbackMetric(name, help, func, kind)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# ===== Shared metrics =====
+
+COMMAND_LATENCY = Histogram(
+    "command_duration_seconds", "Command handler latency.", label="command"
+)
+MONGO_LATENCY = Histogram(
+    "mongo_operation_duration_seconds", "MongoOperations call latency.", label="method"
+)
+BROADCAST_MESSAGES = Counter(
+    "broadcast_messages_total", "Broadcast deliveries by outcome.", label="outcome"
+)
+BROADCAST_ERRORS = Counter(
+    "broadcast_errors_total", "Broadcast delivery errors by exception class.", label="error"
+)
+
+
+def track_command(command: str):
+    """Decorator: record a handler's latency in COMMAND_LATENCY."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                COMMAND_LATENCY.observe(time.perf_counter() - started, command)
+        return wrapper
+    return decorator
+
+
+def instrument_operations(cls):
+    """
+    Record every async static method of `cls` in MONGO_LATENCY.
+    
+    Async generators (cursor streams) are left as they are; their
+    lifetime is the caller's loop, not a database round trip.
+    """
+    for name, attr in list(vars(cls).items()):
+        if not isinstance(attr, staticmethod) or not inspect.iscoroutinefunction(attr.__func__):
+            continue
+        
+        def wrap(func, method=name):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    MONGO_LATENCY.observe(time.perf_counter() - started, method)
+            return wrapper
+        
+        setattr(cls, name, staticmethod(wrap(attr.__func__)))
+    return cls
+
+
+# ===== HTTP endpoint =====
+
+async def _handle_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve GET /metrics; anything else is a 404."""
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), 5)
+        while True:
+            header = await asyncio.wait_for(reader.readline(), 5)
+            if header in (b"\r\n", b"\n", b""):
+                break
+        
+        parts = request_line.split()
+        if len(parts) >= 2 and parts[1].split(b"?")[0] == b"/metrics":
+            status = "200 OK"
+            body = render().encode()
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            status = "404 Not Found"
+            body = b"Not Found\n"
+            content_type = "text/plain"
+        
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> Optional[asyncio.AbstractServer]:
+    """
+    Start the /metrics HTTP endpoint.
+    
+    Returns:
+        The server, or None if disabled (port 0) or it could not bind
+    """
+    if not port:
+        return None
+    try:
+        server = await asyncio.start_server(_handle_request, host, port)
+        print(f"📈 Metrics available at http://{host}:{port}/metrics")
+        return server
+    except Exception as e:
+        print(f"⚠️ Warning: Could not start metrics server: {e}")
+        return None
@@ -0,0 +1,128 @@
+"""
+#(©)HighTierBots
+Event loop lag watchdog. A coroutine ticks on the loop and records how
+late each tick is; a helper thread notices when the ticks stop, captures
+the loop thread's stack while it is still blocked and points at the
+offending frame in our code. Stalls are reported to metrics, stdout and
+the log group.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from utils.metrics import Counter, Histogram
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frames shown in a stall report
+STACK_DEPTH = 12
+
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "Event loop scheduling delay.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+LOOP_STALLS = Counter(
+    "event_loop_stalls_total", "Event loop stalls over the threshold by blocking frame.", label="frame"
+)
+
+
+def _offending_frame(stack: traceback.StackSummary) -> str:
+    """Innermost frame from this project (else the innermost frame), as file:line function."""
+    for frame in reversed(stack):
+        filename = os.path.abspath(frame.filename)
+        if filename.startswith(ROOT) and "site-packages" not in filename and filename != __file__:
+            return f"{os.path.relpath(filename, ROOT)}:{frame.lineno} {frame.name}"
+    frame = stack[-1]
+    return f"{frame.filename}:{frame.lineno} {frame.name}"
+
+
+class LoopWatchdog:
+    """Measures event loop lag and reports blocking calls with their stack."""
+    
+    def __init__(self, threshold: float, report_interval: float, logger=None):
+        """
+        Args:
+            threshold: Lag in seconds that counts as a stall
+            report_interval: Minimum seconds between log group reports per frame
+            logger: Optional Logger for log group reports
+        """
+        self.threshold = threshold
+        self.report_interval = report_interval
+        self.logger = logger
+        self.interval = min(0.1, threshold / 5)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        # (location, formatted stack) captured by the helper thread
+        self._stall: Optional[Tuple[str, str]] = None
+        self._reported_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    def _watch(self):
+        """Helper thread: capture the loop thread's stack once per stall."""
+        while not self._stop.wait(self.interval):
+            if self._stall is not None:
+                continue
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            self._stall = (
+                _offending_frame(stack),
+                "".join(traceback.format_list(stack[-STACK_DEPTH:]))
+            )
+    
+    async def _tick(self):
+        """Loop side: measure lag and report a captured stall once the loop is free."""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._heartbeat = now
+            LOOP_LAG.observe(lag)
+            
+            stall = self._stall
+            if stall is not None:
+                await self._report(lag, *stall)
+                self._stall = None
+    
+    async def _report(self, lag: float, location: str, stack: str):
+        """Count, print and (rate-limited per frame) log a stall."""
+        LOOP_STALLS.inc(location)
+        print(f"⚠️ Event loop blocked for {lag:.2f}s at {location}")
+        
+        now = time.monotonic()
+        last = self._reported_at.get(location)
+        if self.logger is None or (last is not None and now - last < self.report_interval):
+            return
+        self._reported_at[location] = now
+        await self.logger.log_loop_stall(lag, location, stack)
+    
+    def start(self):
+        """Start the tick task and the helper thread (call from the loop thread)."""
+        if self.threshold <= 0 or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the watchdog."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,62 @@
+"""
+#(©)HighTierBots - Broadcast worker run file
+Claims partitions of partitioned broadcasts and sends them. Run as many
+as needed, on any host that can reach MongoDB.
+
+The worker uses WORKER_BOT_TOKEN if set, otherwise BOT_TOKEN. Telegram's
+message limit is per bot token: processes on the same token split
+BROADCAST_RATE between them (see broadcaster/rate_share.py), so extra
+workers on BOT_TOKEN add resilience, not throughput. A separate bot has
+its own limit but can only reach users who have started that bot, and it
+cannot read the owner's chat with the main bot, so it only claims
+partitions of text broadcasts; copied messages are left to workers on
+BOT_TOKEN.
+"""
+
+import asyncio
+import os
+import sys
+
+from pyrogram import Client
+
+from config.config import Config
+from config.database import db
+from broadcaster.engine import broadcast_rate_limiter
+from broadcaster.partitions import PartitionWorker, WORKER_ID
+from broadcaster.rate_share import RateShare
+
+
+async def run_worker():
+  """Start the worker client and claim partitions until stopped."""
+  bot_token = Config.WORKER_BOT_TOKEN or Config.BOT_TOKEN
+  client = Client(
+    name=f"HighTierBots-worker-{os.getpid()}",
+    api_id=Config.API_ID,
+    api_hash=Config.API_HASH,
+    bot_token=bot_token,
+    in_memory=True,
+    no_updates=True
+  )
+  rate_share = RateShare(broadcast_rate_limiter, bot_token, WORKER_ID)
+  await db.initialize()
+  await client.start()
+  rate_share.start()
+  try:
+    await PartitionWorker(
+      client, WORKER_ID, text_only=bool(Config.WORKER_BOT_TOKEN)
+    ).run_forever()
+  finally:
+    await rate_share.stop()
+    if client.is_connected:
+      await client.stop()
+    db.close()
+
+
+if __name__ == "__main__":
+  try:
+    # Same loop as module-level asyncio objects (e.g. the rate limiter's
+    # lock), which bind to get_event_loop() when created on Python < 3.10
+    asyncio.get_event_loop().run_until_complete(run_worker())
+  except KeyboardInterrupt:
+    print("\n👋 Worker stopped")
+    sys.exit(0)